@@ -1,5 +1,5 @@
 from django.contrib import admin
-from bookclub.models import User, Club, Book , Rating, Meeting, Chat
+from bookclub.models import User, Club, Book , Genre, Rating, Meeting, Chat, TrainingState
 
 
 @admin.register(User)
@@ -15,6 +15,10 @@ class ClubAdmin(admin.ModelAdmin):
 class BookAdmin(admin.ModelAdmin):
     list_display = ["ISBN", "title", "author"]
 
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    list_display = ["name"]
+
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ["user_id", "book_id", "review", "rating", "created_at"]
@@ -30,5 +34,8 @@ class ChatAdmin(admin.ModelAdmin):
     """Configuration of the admin interface for events."""
     list_display = ["club", "user", "message", "created_at"]
 
-    
-    
+
+@admin.register(TrainingState)
+class TrainingStateAdmin(admin.ModelAdmin):
+    """Configuration of the admin interface for recommender training."""
+    list_display = ["status", "last_trained_at", "last_duration", "pending", "model_version"]
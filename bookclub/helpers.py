@@ -7,10 +7,13 @@ from django.db.models.functions import Lower
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 
+from bookclub.recommender.materialized import RecommendationRefresher
 from bookclub.recommender.recommendation import Recommendation
+from bookclub.recommender.scheduler import RetrainScheduler
 from bookclub.recommender_helper import RecommenderHelper
+from bookclub.search import search
 
-from .models import Book, Club, User
+from .models import Book, Club, Genre, User
 
 
 class MeetingHelper:
@@ -56,9 +59,9 @@ class SortHelper:
 
     def sort_users(self):
         if(self.sort == 'name_desc'):
-            return self.list_of_objects.reverse()
+            return self.list_of_objects.order_by('-first_name', '-last_name')
         else:
-            return self.list_of_objects
+            return self.list_of_objects.order_by('first_name', 'last_name')
 
     def sort_books(self):
         if(self.sort == 'name_asc'):
@@ -86,25 +89,25 @@ def get_list_of_objects(searched, label):
     filtered_list = ""
 
     if label=="user-name":
-        filtered_list = User.objects.filter(username__contains=searched)
+        filtered_list = search(User, 'username', searched)
         category= "Users"
     elif label=="user-location":
-        filtered_list = User.objects.filter(country__contains=searched)
+        filtered_list = search(User, 'country', searched)
         category= "Users"
     elif label=="club-name":
-        filtered_list = Club.objects.filter(name__contains=searched)
+        filtered_list = search(Club, 'name', searched)
         category= "Clubs"
     elif label=="club-location":
-        filtered_list = Club.objects.filter(country__contains=searched)
+        filtered_list = search(Club, 'country', searched)
         category= "Clubs"
     elif label=="book-title":
-        filtered_list = Book.objects.filter(title__contains=searched)
+        filtered_list = search(Book, 'title', searched)
         category= "Books"
     elif label=="book-genre":
-        filtered_list = Book.objects.filter(genre__contains=searched)
+        filtered_list = search(Book, 'genre', searched)
         category= "Books"
     elif label=="book-author":
-        filtered_list = Book.objects.filter(author__contains=searched)
+        filtered_list = search(Book, 'author', searched)
         category= "Books"
     else:
         return {"category": None, "filtered_list": []}
@@ -161,31 +164,26 @@ class NotificationHelper:
                     notif.mark_as_read()
 
 
-def getGenres():
-    genres = {}
-    books = Book.objects.all()
-    
-    for book in books:
-        genreList = book.genre.split(',')
-            
-        for genre in genreList:
-            if genre != '':
-                if genre in genres:
-                    genres[genre] += 1
-                else:
-                    genres[genre] = 1
-
-    return genres
+def getGenres(limit=None):
+    """Return {genre name: number of books} of the limit genres with most books, most first.
+
+    Reads the maintained Genre.book_count through its index, so the cost
+    does not depend on the size of the catalog."""
+    return dict(Genre.top(limit).values_list('name', 'book_count'))
 
 def get_recommender_books(request, is_item_based, numOfRecs, user_id=None, book_id=None, club_id=None):
-    user_count = User.objects.count()
-    limit = user_count/10
-    if user_count < 10:
-        limit = 7
-    if rec_helper.counter >= limit:
-        rec_helper.reset_counter()
+    if is_item_based:
+        retrain_scheduler.maybe_retrain()
+
+    with rec_helper.pin():
+        rec = Recommendation(is_item_based, rec_helper)  
+        return rec.get_recommendations(request, numOfRecs, user_id=user_id, book_id=book_id, club_id=club_id)
 
-    rec = Recommendation(is_item_based, rec_helper)  
-    return rec.get_recommendations(request, numOfRecs, user_id=user_id, book_id=book_id, club_id=club_id)
+def get_user_recommended_books(user_id, numOfRecs):
+    retrain_scheduler.maybe_retrain()
+    return recommendation_refresher.get_books(user_id, numOfRecs)
 
 rec_helper = RecommenderHelper()
+rec_helper.load_latest(settings.RECOMMENDER_ARTIFACT_DIR, settings.RECOMMENDER_SHARED_MEMORY)
+retrain_scheduler = RetrainScheduler(rec_helper, background=settings.RECOMMENDER_TRAIN_IN_BACKGROUND)
+recommendation_refresher = RecommendationRefresher(rec_helper, background=settings.RECOMMENDER_REFRESH_IN_BACKGROUND)
@@ -0,0 +1,260 @@
+import heapq
+import math
+import sys
+import time
+from collections import defaultdict
+from operator import itemgetter
+
+import numpy as np
+from bookclub.recommender.ann import FactorIndex
+from bookclub.recommender.bitsets import GenreBitsets
+from bookclub.recommender.neighbors import ItemNeighborIndex
+from bookclub.recommender.scoring import top_n
+from django.core.management.base import BaseCommand, CommandError
+from scipy.sparse import random as sparse_random
+
+
+def weighted_row_sum(matrix, rows, weights):
+    """Return the weighted sum of the given dense similarity matrix rows as one score vector.
+
+    The dense candidate generation the neighbour index replaced, kept as
+    the baseline of the candidates and neighbors benchmarks. Rows are
+    accumulated in the order given so every column adds its terms in the
+    same order as the legacy Python loop, which keeps equal scores ranked
+    the same way."""
+    scores = np.zeros(matrix.shape[1], dtype=np.float64)
+    for row, weight in zip(rows, weights):
+        scores += matrix[row] * weight
+    return scores
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the recommender scoring paths on synthetic data.'
+
+    BENCHMARKS = ['candidates', 'neighbors', 'batch', 'ann', 'genres']
+
+    def add_arguments(self, parser):
+        parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run: {', '.join(self.BENCHMARKS)}. Runs all by default.")
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--ratings', type=int, default=30)
+        parser.add_argument('--recs', type=int, default=24)
+        parser.add_argument('--neighbors', type=int, default=50)
+        parser.add_argument('--factors', type=int, default=100)
+        parser.add_argument('--lists', type=int, default=None)
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+        parser.add_argument('--genres', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = np.random.default_rng(options['seed'])
+        for benchmark in options['benchmarks'] or self.BENCHMARKS:
+            if benchmark not in self.BENCHMARKS:
+                raise CommandError(f'Unknown benchmark: {benchmark}')
+            print(f"--- {benchmark} ---")
+            getattr(self, f'benchmark_{benchmark}')(options)
+
+    def make_profiles(self, n_users, n_items, n_ratings):
+        profiles = []
+        for _ in range(n_users):
+            items = self.rng.choice(n_items, size=min(n_ratings, n_items), replace=False)
+            ratings = self.rng.integers(0, 11, size=items.size)
+            profiles.append([(int(item), float(rating)) for item, rating in zip(items, ratings)])
+        return profiles
+
+    def benchmark_candidates(self, options):
+        n_items = options['items']
+        similarity_matrix = np.round(self.rng.random((n_items, n_items)), 2)
+        profiles = self.make_profiles(options['users'], n_items, options['ratings'])
+        num_of_rec = options['recs']
+
+        start = time.time()
+        legacy = [self.legacy_ranking(similarity_matrix, profile, num_of_rec) for profile in profiles]
+        legacy_time = time.time() - start
+        print("legacy candidates: ", legacy_time)
+
+        start = time.time()
+        vectorized = [self.vectorized_ranking(similarity_matrix, profile, num_of_rec) for profile in profiles]
+        vectorized_time = time.time() - start
+        print("vectorized candidates: ", vectorized_time)
+
+        if legacy != vectorized:
+            raise CommandError('Vectorized ranking differs from the legacy ranking.')
+        print("speedup: ", legacy_time / max(vectorized_time, 1e-9))
+
+    def legacy_ranking(self, similarity_matrix, profile, num_of_rec, k=20):
+        k_neighbors = heapq.nlargest(k, profile, key=lambda t: t[1])
+        candidates = defaultdict(float)
+        for itemID, rating in k_neighbors:
+            for innerID, score in enumerate(similarity_matrix[itemID]):
+                candidates[innerID] += score * (rating/10)
+
+        read = {itemID for itemID, _ in profile}
+        recommendations = []
+        for itemID, _ in sorted(candidates.items(), key=itemgetter(1), reverse=True):
+            if itemID not in read:
+                recommendations.append(itemID)
+                if len(recommendations) >= num_of_rec:
+                    break
+        return recommendations
+
+    def vectorized_ranking(self, similarity_matrix, profile, num_of_rec, k=20):
+        k_neighbors = heapq.nlargest(k, profile, key=lambda t: t[1])
+        rows, weights = zip(*[(itemID, rating/10) for itemID, rating in k_neighbors])
+        scores = weighted_row_sum(similarity_matrix, rows, weights)
+
+        read = np.zeros(scores.size, dtype=bool)
+        read[[itemID for itemID, _ in profile]] = True
+        return [int(itemID) for itemID in top_n(scores, num_of_rec, read)]
+
+    def benchmark_neighbors(self, options):
+        n_items = options['items']
+        n_users = max(options['users'], n_items // 2)
+        ratings = sparse_random(n_users, n_items, density=options['ratings'] / n_items, format='csr',
+                                random_state=options['seed']) * 10
+        profiles = self.make_profiles(options['users'], n_items, options['ratings'])
+
+        start = time.time()
+        index = ItemNeighborIndex.from_ratings(ratings, k=options['neighbors'])
+        print("build neighbor index: ", time.time() - start)
+
+        dense_bytes = n_items * n_items * 8
+        index_bytes = index.indptr.nbytes + index.indices.nbytes + index.scores.nbytes
+        print("dense similarity MB: ", dense_bytes / 2**20)
+        print("neighbor index MB: ", index_bytes / 2**20)
+
+        similarity_matrix = self.rng.random((n_items, n_items))
+        start = time.time()
+        for profile in profiles:
+            k_neighbors = heapq.nlargest(20, profile, key=lambda t: t[1])
+            rows, weights = zip(*[(itemID, rating/10) for itemID, rating in k_neighbors])
+            weighted_row_sum(similarity_matrix, rows, weights)
+        dense_time = time.time() - start
+        print("dense candidates: ", dense_time)
+
+        start = time.time()
+        for profile in profiles:
+            k_neighbors = heapq.nlargest(20, profile, key=lambda t: t[1])
+            rows, weights = zip(*[(itemID, rating/10) for itemID, rating in k_neighbors])
+            index.candidates(rows, weights)
+        index_time = time.time() - start
+        print("neighbor index candidates: ", index_time)
+        print("speedup: ", dense_time / max(index_time, 1e-9))
+
+    def benchmark_batch(self, options):
+        n_items = options['items']
+        n_users = max(options['users'], n_items // 2)
+        ratings = sparse_random(n_users, n_items, density=options['ratings'] / n_items, format='csr',
+                                random_state=options['seed']) * 10
+        index = ItemNeighborIndex.from_ratings(ratings, k=options['neighbors'])
+        profiles = self.make_profiles(options['users'], n_items, options['ratings'])
+        num_of_rec = options['recs']
+
+        start = time.time()
+        looped = []
+        for profile in profiles:
+            rows, weights = self.profile_rows(profile)
+            items, scores = index.candidates(rows, weights)
+            read = np.isin(items, [itemID for itemID, _ in profile])
+            looped.append(items[top_n(scores, num_of_rec, read)].tolist())
+        loop_time = time.time() - start
+        print("per-user loop: ", loop_time)
+
+        start = time.time()
+        groups, rows, weights, read_keys = [], [], [], []
+        for position, profile in enumerate(profiles):
+            profile_rows, profile_weights = self.profile_rows(profile)
+            groups.extend([position] * len(profile_rows))
+            rows.extend(profile_rows)
+            weights.extend(profile_weights)
+            read_keys.extend(position * n_items + itemID for itemID, _ in profile)
+        owners, items, scores = index.batch_candidates(groups, rows, weights)
+        read = np.isin(owners * n_items + items, read_keys)
+        bounds = np.searchsorted(owners, np.arange(len(profiles) + 1))
+        batched = []
+        for position in range(len(profiles)):
+            begin, end = bounds[position], bounds[position + 1]
+            batched.append(items[begin:end][top_n(scores[begin:end], num_of_rec, read[begin:end])].tolist())
+        batch_time = time.time() - start
+        print("batch: ", batch_time)
+
+        if looped != batched:
+            raise CommandError('Batch ranking differs from the per-user ranking.')
+        print("users per second (loop): ", len(profiles) / max(loop_time, 1e-9))
+        print("users per second (batch): ", len(profiles) / max(batch_time, 1e-9))
+        print("speedup: ", loop_time / max(batch_time, 1e-9))
+
+    def benchmark_ann(self, options):
+        n_items = options['items']
+        factors = self.rng.normal(scale=0.1, size=(n_items, options['factors']))
+        biases = self.rng.normal(scale=0.5, size=n_items)
+        queries = self.rng.normal(scale=0.1, size=(options['users'], options['factors']))
+        num_of_rec = options['recs']
+
+        start = time.time()
+        index = FactorIndex.from_factors(factors, biases, n_lists=options['lists'])
+        print("build factor index: ", time.time() - start)
+        print("lists: ", index.n_lists)
+
+        start = time.time()
+        exact = [set(top_n(factors @ query + biases, num_of_rec).tolist()) for query in queries]
+        exact_time = time.time() - start
+        print("exact: ", exact_time)
+
+        for nprobe in options['nprobe']:
+            start = time.time()
+            found = [index.search(query, num_of_rec, nprobe) for query in queries]
+            ann_time = time.time() - start
+            recall = np.mean([len(expected & set(items.tolist())) / num_of_rec for expected, items in zip(exact, found)])
+            print(f"nprobe {nprobe}: ", ann_time, " recall@N: ", recall, " speedup: ", exact_time / max(ann_time, 1e-9))
+
+    def benchmark_genres(self, options):
+        n_items, n_genres = options['items'], options['genres']
+        book_genres = [(item, self.rng.choice(n_genres, size=self.rng.integers(1, 6), replace=False).tolist())
+                       for item in range(n_items)]
+        seeds = self.rng.choice(n_items, size=min(options['users'], n_items), replace=False).tolist()
+
+        bitfields = {}
+        for item, genres in book_genres:
+            bitfield = [0] * n_genres
+            for genre in genres:
+                bitfield[genre] = 1
+            bitfields[item] = bitfield
+        bitsets = GenreBitsets.from_genres((item, sorted(genres)) for item, genres in book_genres)
+        legacy_bytes = sum(sys.getsizeof(bitfield) for bitfield in bitfields.values())
+        print("legacy bitfields bytes: ", legacy_bytes)
+        print("packed bitsets bytes: ", bitsets.nbytes)
+        print("memory reduction: ", legacy_bytes / bitsets.nbytes)
+
+        start = time.time()
+        legacy = [[self.legacy_cosine(bitfields[seed], bitfields[item]) for item in range(n_items)] for seed in seeds]
+        legacy_time = time.time() - start
+        print("legacy cosine: ", legacy_time)
+
+        start = time.time()
+        packed = [bitsets.similarities(seed) for seed in seeds]
+        packed_time = time.time() - start
+        print("popcount cosine: ", packed_time)
+
+        if not np.allclose(legacy, packed):
+            raise CommandError('Popcount similarities differ from the legacy cosine.')
+        print("speedup: ", legacy_time / max(packed_time, 1e-9))
+
+        start = time.time()
+        for _ in bitsets.all_pairs():
+            pass
+        print("all pairs: ", time.time() - start)
+
+    def legacy_cosine(self, genres1, genres2):
+        sumxx, sumxy, sumyy = 0, 0, 0
+        for x, y in zip(genres1, genres2):
+            sumxx += x * x
+            sumyy += y * y
+            sumxy += x * y
+        if sumxx*sumyy == 0:
+            return 0
+        return sumxy/math.sqrt(sumxx*sumyy)
+
+    def profile_rows(self, profile, k=20):
+        k_neighbors = heapq.nlargest(k, profile, key=lambda t: t[1])
+        return [itemID for itemID, _ in k_neighbors], [rating/10 for _, rating in k_neighbors]
@@ -0,0 +1,22 @@
+from bookclub.recommender.metrics import PERCENTILES, pipeline_metrics
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Show per-stage latency and query counts of the recommendation pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the recorded metrics of every process.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            pipeline_metrics.clear()
+            print("metrics cleared")
+            return
+
+        summary = pipeline_metrics.summary()
+        for name, stage in summary['stages'].items():
+            percentiles = ', '.join(f"p{percentile} {stage[f'p{percentile}_ms']:.2f}ms" for percentile in PERCENTILES)
+            print(f"{name}: ", f"{stage['calls']} calls, {percentiles}, {stage['queries_per_call']:.1f} queries/call")
+        for name, value in summary['counters'].items():
+            print(f"{name}: ", value)
@@ -0,0 +1,10 @@
+from bookclub.helpers import retrain_scheduler
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Show the state of recommender retraining.'
+
+    def handle(self, *args, **options):
+        for key, value in retrain_scheduler.status().items():
+            print(f"{key}: ", value)
@@ -0,0 +1,22 @@
+import time
+
+from bookclub.helpers import recommendation_refresher
+from bookclub.models import User
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stale materialized user recommendations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute the recommendations of every user.')
+
+    def handle(self, *args, **options):
+        start = time.time()
+        if options['all']:
+            refreshed = recommendation_refresher.refresh_many(list(User.objects.values_list('id', flat=True)))
+        else:
+            refreshed = recommendation_refresher.refresh_stale()
+        end = time.time()
+        print("refreshed: ", refreshed)
+        print("time: ", end - start)
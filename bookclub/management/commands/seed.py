@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 
 import pytz
 from bookclub.helpers import NotificationHelper
-from bookclub.models import Book, Club, Meeting, Rating, User
+from bookclub.models import Book, Club, Genre, Meeting, Rating, User
 from django.core.management.base import BaseCommand
 from faker import Faker
 from notifications.signals import notify
@@ -225,6 +225,9 @@ class Command(BaseCommand):
                     
             if books:
                 Book.objects.bulk_create(books)
+
+        # bulk_create skips the post_save receiver that links genres
+        Genre.link(Book.objects.all())
                 
 
     def create_ratings(self):
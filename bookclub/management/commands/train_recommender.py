@@ -0,0 +1,19 @@
+import time
+
+from bookclub.helpers import retrain_scheduler
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Train the recommender once and save it as a versioned artifact.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=3, help='Number of artifact versions to keep.')
+
+    def handle(self, *args, **options):
+        start = time.time()
+        if not retrain_scheduler.train_now(keep=options['keep']):
+            raise CommandError('A recommender training job is already running.')
+        end = time.time()
+        print("trained: ", end - start)
+        print("version: ", retrain_scheduler.rec_helper.model.version)
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.11 on 2026-10-18 07:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookclub', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Idle', 'Idle'), ('Running', 'Running')], default='Idle', max_length=7)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_trained_at', models.DateTimeField(blank=True, null=True)),
+                ('last_duration', models.FloatField(blank=True, null=True)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('model_version', models.CharField(blank=True, max_length=30)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='rating',
+            name='updated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.11 on 2026-10-18 07:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookclub', '0002_rating_updated_at_trainingstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_ids', models.JSONField(default=list)),
+                ('is_stale', models.BooleanField(db_index=True, default=False)),
+                ('invalidated_at', models.DateTimeField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('model_version', models.CharField(blank=True, max_length=30)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
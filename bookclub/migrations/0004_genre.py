@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_genres(apps, schema_editor):
+    """Link every existing book to the genres of its comma-separated genre column."""
+    Book = apps.get_model('bookclub', 'Book')
+    Genre = apps.get_model('bookclub', 'Genre')
+    through = Book.genres.through
+
+    last_id = 0
+    while True:
+        rows = list(Book.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'genre')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        names = {book_id: list(dict.fromkeys(name for name in genre.split(',') if name)) for book_id, genre in rows}
+        all_names = {name for book_names in names.values() for name in book_names}
+        Genre.objects.bulk_create([Genre(name=name) for name in all_names], ignore_conflicts=True)
+        genre_ids = dict(Genre.objects.filter(name__in=all_names).values_list('name', 'id'))
+        through.objects.bulk_create([
+            through(book_id=book_id, genre_id=genre_ids[name])
+            for book_id, book_names in names.items() for name in book_names
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookclub', '0003_userrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=220, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='books', to='bookclub.Genre'),
+        ),
+        migrations.RunPython(backfill_genres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_books(apps, schema_editor):
+    """Fill in every genre's book count from its current links."""
+    Genre = apps.get_model('bookclub', 'Genre')
+    through = apps.get_model('bookclub', 'Book').genres.through
+    counts = through.objects.filter(genre_id=OuterRef('id')).order_by().values('genre_id').annotate(
+        count=Count('id')).values('count')
+    Genre.objects.update(book_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookclub', '0004_genre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='book_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(count_books, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:29
+
+import bookclub.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Searched table -> indexed columns of its FTS5 table
+SEARCHED_COLUMNS = {
+    'bookclub_book': ['title', 'author', 'genre'],
+    'bookclub_user': ['username', 'country'],
+    'bookclub_club': ['name', 'country'],
+}
+
+
+def create_search_tables(apps, schema_editor):
+    """Create an FTS5 table over each searched table, the triggers keeping it in sync and its index.
+
+    The trigram tokenizer indexes every 3 character substring, so a
+    query matches anywhere inside a value as the LIKE '%query%' searches
+    it replaces did. Updates only reindex a row when an indexed column
+    changes. Other databases keep searching with LIKE."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table, columns in SEARCHED_COLUMNS.items():
+        search_table = f'{table}_search'
+        names = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        delete = f"INSERT INTO {search_table}({search_table}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+        insert = f'INSERT INTO {search_table}(rowid, {names}) VALUES (new.id, {new_values});'
+
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {search_table} USING fts5({names}, "
+            f"content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        schema_editor.execute(f'CREATE TRIGGER {search_table}_insert AFTER INSERT ON {table} BEGIN {insert} END')
+        schema_editor.execute(f'CREATE TRIGGER {search_table}_delete AFTER DELETE ON {table} BEGIN {delete} END')
+        schema_editor.execute(
+            f'CREATE TRIGGER {search_table}_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END'
+        )
+        schema_editor.execute(f"INSERT INTO {search_table}({search_table}) VALUES ('rebuild')")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table in SEARCHED_COLUMNS:
+        search_table = f'{table}_search'
+        for event in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {search_table}_{event}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {search_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookclub', '0005_genre_book_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookSearch',
+            fields=[
+                ('book', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='bookclub.book')),
+                ('title', bookclub.models.SearchField()),
+                ('author', bookclub.models.SearchField()),
+                ('genre', bookclub.models.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'bookclub_book_search',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ClubSearch',
+            fields=[
+                ('club', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='bookclub.club')),
+                ('name', bookclub.models.SearchField()),
+                ('country', bookclub.models.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'bookclub_club_search',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserSearch',
+            fields=[
+                ('user', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='bookclub.user')),
+                ('username', bookclub.models.SearchField()),
+                ('country', bookclub.models.SearchField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'bookclub_user_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -1,10 +1,14 @@
 import datetime
+from collections import Counter, defaultdict
 
 import pytz
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, pre_delete
 from django.forms import ValidationError
+from django.utils import timezone
 from isbn_field import ISBNField
 from libgravatar import Gravatar
 
@@ -152,6 +156,7 @@ class User(AbstractUser):
         """Add book to user's books."""
         if book not in self.all_books.all():
             self.all_books.add(book)
+            UserRecommendation.mark_stale(self.id)
 
 
 class Club(models.Model):
@@ -276,6 +281,72 @@ class Club(models.Model):
                 previous_meetings.append(meeting)
         return previous_meetings
 
+class Genre(models.Model):
+    """Genre model.
+
+    Mirrors the comma-separated Book.genre column so books can be filtered
+    and counted by genre through indexed joins."""
+
+    name = models.CharField(
+        max_length=220,
+        unique=True,
+        blank=False
+    )
+
+    book_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True
+    )
+
+    class Meta:
+        ordering = ['name']
+
+    @staticmethod
+    def names_from(genre):
+        """Return the distinct genre names of a Book.genre value, in order."""
+        return list(dict.fromkeys(name for name in genre.split(',') if name))
+
+    @classmethod
+    def top(cls, limit):
+        """Return the limit genres with the most books, most books first."""
+        return cls.objects.filter(book_count__gt=0).order_by('-book_count', 'name')[:limit]
+
+    @classmethod
+    def link(cls, books):
+        """Link books to the genres of their genre column, replacing older links.
+
+        Genre book counts are adjusted by the links added and removed. Uses
+        a fixed number of bulk queries whatever the number of books; all
+        Book-Genre links should be made through here to keep counts right."""
+        names = {book.id: cls.names_from(book.genre) for book in books}
+        all_names = {name for book_names in names.values() for name in book_names}
+        cls.objects.bulk_create([cls(name=name) for name in all_names], ignore_conflicts=True)
+        genre_ids = dict(cls.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+        through = Book.genres.through
+        old_links = through.objects.filter(book_id__in=names)
+        changes = Counter(old_links.values_list('genre_id', flat=True))
+        old_links.delete()
+        new_links = [
+            through(book_id=book_id, genre_id=genre_ids[name])
+            for book_id, book_names in names.items() for name in book_names
+        ]
+        through.objects.bulk_create(new_links)
+
+        changes.subtract(link.genre_id for link in new_links)
+        cls.adjust_book_counts({genre_id: -change for genre_id, change in changes.items()})
+
+    @classmethod
+    def adjust_book_counts(cls, changes):
+        """Add {genre id: change} to the book counts, with one update per distinct change."""
+        genre_ids = defaultdict(list)
+        for genre_id, change in changes.items():
+            if change:
+                genre_ids[change].append(genre_id)
+        for change, ids in genre_ids.items():
+            cls.objects.filter(id__in=ids).update(book_count=F('book_count') + change)
+
+
 class Book(models.Model):
     """Book model."""
 
@@ -329,6 +400,12 @@ class Book(models.Model):
         related_name='books'
     )
 
+    genres = models.ManyToManyField(
+        Genre,
+        related_name='books',
+        blank=True
+    )
+
     readers_count = models.PositiveIntegerField(
         default=0
     )
@@ -340,6 +417,19 @@ class Book(models.Model):
     class Meta:
         ordering = ['title']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        book = super().from_db(db, field_names, values)
+        if 'genre' in field_names:
+            book._linked_genre = book.genre
+        return book
+
+    def link_genres(self):
+        """Link the book to its genres if the genre column changed since it was loaded."""
+        if getattr(self, '_linked_genre', None) != self.genre:
+            Genre.link([self])
+            self._linked_genre = self.genre
+
     def is_reader(self, reader):
         """Return whether user is a reader of the book."""
         return self.readers.all().filter(id=reader.id).exists()
@@ -350,6 +440,7 @@ class Book(models.Model):
             self.readers.add(reader)
             self.readers_count = self.readers.count()
             self.save()
+            UserRecommendation.mark_stale(reader.id)
 
     def remove_reader(self, reader):
         """Remove user from book's readers."""
@@ -357,6 +448,7 @@ class Book(models.Model):
             self.readers.remove(reader)
             self.readers_count = self.readers.count()
             self.save()
+            UserRecommendation.mark_stale(reader.id)
 
     def add_club(self, club):
         """Add club to book's clubs."""
@@ -414,14 +506,21 @@ class Rating(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True
+    )
+
     class Meta:
         unique_together = ['user', 'book']
 
 
     def save(self, *args, **kwargs):
         """Save book's rating and recalculate average."""
+        self.updated_at = timezone.now()
         super(Rating, self).save(*args, **kwargs)
         self.book.calculate_average_rating()
+        UserRecommendation.mark_stale(self.user_id)
 
 
 class Meeting(models.Model):
@@ -526,3 +625,189 @@ class Chat(models.Model):
         #Check that the user is a member of the club.
         if not self.user in self.club.members.all():
             raise ValidationError('User must be a member of the club')
+
+
+class TrainingState(models.Model):
+    """Recommender training state shared by all worker processes."""
+
+    class Status(models.TextChoices):
+        IDLE = "Idle"
+        RUNNING = "Running"
+
+    status = models.CharField(
+        max_length=7,
+        choices=Status.choices,
+        default=Status.IDLE
+    )
+
+    started_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    last_trained_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    last_duration = models.FloatField(
+        blank=True,
+        null=True
+    )
+
+    pending = models.PositiveIntegerField(
+        default=0
+    )
+
+    model_version = models.CharField(
+        max_length=30,
+        blank=True
+    )
+
+    @classmethod
+    def get_state(cls):
+        """Return the single training state row."""
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
+
+
+class UserRecommendation(models.Model):
+    """Precomputed ranked book recommendations of a user."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendation'
+    )
+
+    book_ids = models.JSONField(
+        default=list
+    )
+
+    is_stale = models.BooleanField(
+        default=False,
+        db_index=True
+    )
+
+    invalidated_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    computed_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    model_version = models.CharField(
+        max_length=30,
+        blank=True
+    )
+
+    @classmethod
+    def mark_stale(cls, *user_ids):
+        """Mark the given users' recommendations as needing a refresh."""
+        cls.objects.filter(user_id__in=user_ids).update(is_stale=True, invalidated_at=timezone.now())
+
+    @classmethod
+    def mark_all_stale(cls):
+        """Mark every user's recommendations as needing a refresh."""
+        cls.objects.update(is_stale=True, invalidated_at=timezone.now())
+
+
+class SearchField(models.TextField):
+    """Column of an SQLite FTS5 table."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    """FTS5 full-text query restricted to one column: column__match='"query"'."""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class BookSearch(models.Model):
+    """Full-text index of book titles, authors and genres.
+
+    An FTS5 table over the Book table, kept in sync by the triggers of
+    migration 0006 on SQLite. rank is the BM25 score of the row for the
+    query it was matched by, lowest first, so it is only defined in a query
+    that filters with the match lookup."""
+
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+
+    title = SearchField()
+    author = SearchField()
+    genre = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'bookclub_book_search'
+
+
+class UserSearch(models.Model):
+    """Full-text index of usernames and countries; see BookSearch."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+
+    username = SearchField()
+    country = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'bookclub_user_search'
+
+
+class ClubSearch(models.Model):
+    """Full-text index of club names and countries; see BookSearch."""
+
+    club = models.OneToOneField(
+        Club,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+
+    name = SearchField()
+    country = SearchField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'bookclub_club_search'
+
+
+def unlink_book_genres(sender, instance, **kwargs):
+    """pre_delete receiver: take the book out of its genres' counts before its links go."""
+    Genre.objects.filter(books=instance).update(book_count=F('book_count') - 1)
+
+
+def link_book_genres(sender, instance, **kwargs):
+    """post_save receiver: link the saved book to its genres.
+
+    A receiver rather than part of Book.save so books loaded from fixtures,
+    which skip save(), are linked too."""
+    instance.link_genres()
+
+
+post_save.connect(link_book_genres, sender=Book)
+pre_delete.connect(unlink_book_genres, sender=Book)
@@ -1,82 +1,53 @@
-import math
-from collections import ChainMap, defaultdict
+import numpy as np
+from bookclub.models import Book
+from django.conf import settings
 
-from bookclub.models import Book, User
+from .genres import genre_index
+from .metrics import pipeline_metrics
+from .read_sets import ReadSetProvider
 
 
 class GenreSimilarityModel:
+
+    def __init__(self, read_sets=None):
+        self.read_sets = read_sets if read_sets is not None else ReadSetProvider()
     
     def get_recommendations_for_book(self, user_id, book_id):
-        book = Book.objects.get(id=book_id)
-        user = User.objects.get(id=user_id)
-        books = user.all_books.all()
-        all_books = Book.objects.all().exclude(id__in=books).exclude(id=book.id)
-
-        genres = self.getGenres()
-        similarity = {}    
-        for b in all_books:
-            num = self.computeGenreSimilarity(book.id, b.id, genres)
-            if num > 0:
-                similarity[b.id] = num
-
-        sorted_similarity = dict(sorted(similarity.items(), reverse=True, key=lambda item: item[1]))
-        return sorted_similarity
-
-    def get_genre_recommendations(self, user_id):
-        user = User.objects.get(id=user_id)
-        books = user.books.all()
-
-        similarity = []   
-        for book in books:
-            sim = self.get_recommendations_for_book(user_id, book.id)
-            similarity.append(sim)
-        
-        similarity = ChainMap(*similarity)
-        sorted_similarity = sorted(similarity, reverse=True, key=similarity.get)
-        return sorted_similarity
-
-    def computeGenreSimilarity(self, book1, book2, genres):
-        genres1 = genres[book1]
-        genres2 = genres[book2]
-        sumxx, sumxy, sumyy = 0, 0, 0
-        for i in range(len(genres1)):
-            x = genres1[i]
-            y = genres2[i]
-            sumxx += x * x
-            sumyy += y * y
-            sumxy += x * y
-        
-        if sumxx*sumyy == 0:
-            return 0
-
-        return sumxy/math.sqrt(sumxx*sumyy)
-
-    def getGenres(self):
-        genres = defaultdict(list)
-        genreIDs = {}
-        maxGenreID = 0
-        books = Book.objects.all()
-        
-        for book in books:
-            book_id = book.id
-            genreList = book.genre.split(',')
-            genreIDList = []
-            
-            for genre in genreList:
-                if genre in genreIDs:
-                    genreID = genreIDs[genre]
-                else:
-                    genreID = maxGenreID
-                    genreIDs[genre] = genreID
-                    maxGenreID += 1
-                genreIDList.append(genreID)
-            
-            genres[book_id] = genreIDList
-        
-        for (book_id, genreIDList) in genres.items():
-            bitfield = [0] * maxGenreID
-            for genreID in genreIDList:
-                bitfield[genreID] = 1
-            genres[book_id] = bitfield            
-        
-        return genres
+        read = self.read_sets.get(user_id)
+
+        with pipeline_metrics.stage('genre_load'):
+            if genre_index.genres(book_id) is None:
+                raise Book.DoesNotExist(f'Book {book_id} does not exist.')
+
+        with pipeline_metrics.stage('genre_similarity'):
+            book_ids, similarity = genre_index.similarities(book_id)
+            ranked = self.rank(book_ids, similarity, [book_id], read)
+        pipeline_metrics.count('candidates_scored', len(book_ids))
+        return ranked
+
+    def get_genre_recommendations(self, user_id, aggregate=None):
+        """Rank the books sharing a genre with any book the user reads in one pass.
+
+        The books' similarities are combined with aggregate, 'sum' or 'max'
+        (RECOMMENDER_GENRE_AGGREGATE by default), so a book close to several
+        of them ranks higher with 'sum'. The user's own books and read books
+        are never returned."""
+        seeds = list(Book.readers.through.objects.filter(user_id=user_id).values_list('book_id', flat=True))
+        read = self.read_sets.get(user_id)
+
+        with pipeline_metrics.stage('genre_similarity'):
+            book_ids, similarity = genre_index.profile_similarities(
+                seeds, aggregate or settings.RECOMMENDER_GENRE_AGGREGATE
+            )
+            ranked = self.rank(book_ids, similarity, seeds, read)
+        pipeline_metrics.count('candidates_scored', len(book_ids))
+        return list(ranked)
+
+    def rank(self, book_ids, similarity, seeds, read):
+        """Return {book id: similarity} of the similar books, most similar first.
+
+        Seed books and read books are skipped; ties go to the lower book id."""
+        keep = (similarity > 0) & ~read.contains(book_ids) & ~np.isin(book_ids, seeds)
+        book_ids, similarity = book_ids[keep], similarity[keep]
+        order = np.lexsort((book_ids, -similarity))
+        return dict(zip(book_ids[order].tolist(), similarity[order].tolist()))
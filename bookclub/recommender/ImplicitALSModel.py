@@ -0,0 +1,91 @@
+import numpy as np
+from django.conf import settings
+
+from .als import load_interactions, solve_user
+from .metrics import pipeline_metrics
+from .read_sets import ReadSetProvider
+from .scoring import top_n
+
+
+class ImplicitALSModel:
+    """Recommends books from reading lists, readers and club books alone.
+
+    Serves users who have not rated anything. Their latent vector is solved
+    against the trained ALS item factors from their current signals on
+    every request, so books added since training count straight away."""
+
+    def __init__(self, recHelper, read_sets=None):
+
+        self.model = recHelper.model
+        self.read_sets = read_sets if read_sets is not None else ReadSetProvider()
+
+    def get_user_factors(self, user_id):
+        """Return the user's latent vector and the ALS rows of their books, or None."""
+        _, book_ids, weights = load_interactions([user_id])
+        return self.fold_in(book_ids, weights)
+
+    def fold_in(self, book_ids, weights):
+        """Return the latent vector of a user with the given signals and the ALS rows of their books, or None."""
+        items = self.model.to_als_iids(book_ids)
+        known = items >= 0
+        if not known.any():
+            return None
+
+        items = items[known]
+        confidence = np.bincount(items, weights[known] * settings.RECOMMENDER_ALS_ALPHA, self.model.als_raw_iids.size)
+        items = np.flatnonzero(confidence)
+        factors = solve_user(self.model.als_item_factors, self.model.als_gram, items, confidence[items],
+                             settings.RECOMMENDER_ALS_REGULARIZATION)
+        return factors, items
+
+    def get_recommendations(self, user_id, num_of_rec):
+        """Return the ids of the user's num_of_rec best scoring unread books.
+
+        Returns [] if the model has no ALS factors or knows none of the
+        user's books."""
+        if self.model is None or self.model.als_raw_iids.size == 0:
+            return []
+
+        with pipeline_metrics.stage('fold_in'):
+            user = self.get_user_factors(user_id)
+        if user is None:
+            return []
+
+        factors, items = user
+        with pipeline_metrics.stage('candidates'):
+            scores = self.model.als_item_factors @ factors
+        pipeline_metrics.count('candidates_scored', len(scores))
+        with pipeline_metrics.stage('filtering'):
+            read = self.read_sets.get(user_id).contains(self.model.als_raw_iids)
+            read[items] = True
+        with pipeline_metrics.stage('ranking'):
+            return self.model.als_raw_iids[top_n(scores, num_of_rec, read)].tolist()
+
+    def get_recommendations_batch(self, user_ids, num_of_rec):
+        """Return {user id: ranked book ids} for the users the model can serve.
+
+        The signals and read lists of all users are loaded with one set of
+        queries; every user gets the list get_recommendations would return.
+        Users get_recommendations would give [] are left out."""
+        if self.model is None or self.model.als_raw_iids.size == 0:
+            return {}
+
+        signal_users, book_ids, weights = load_interactions(user_ids)
+        signals = {}
+        for position, user_id in enumerate(signal_users.tolist()):
+            signals.setdefault(user_id, []).append(position)
+
+        users = {}
+        for user_id, positions in signals.items():
+            user = self.fold_in(book_ids[positions], weights[positions])
+            if user is not None:
+                users[user_id] = user
+
+        read_sets = self.read_sets.get_many(list(users))
+        recommendations = {}
+        for user_id, (factors, items) in users.items():
+            scores = self.model.als_item_factors @ factors
+            read = read_sets[user_id].contains(self.model.als_raw_iids)
+            read[items] = True
+            recommendations[user_id] = self.model.als_raw_iids[top_n(scores, num_of_rec, read)].tolist()
+        return recommendations
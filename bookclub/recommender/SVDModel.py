@@ -1,88 +1,142 @@
 import heapq
 from collections import defaultdict
-from operator import itemgetter
-from threading import Timer
 
-import pandas as pd
-from bookclub.models import Rating, User
-from surprise import SVD, Dataset, Reader
+import numpy as np
+from bookclub.models import Rating
+from django.conf import settings
+from django.utils import timezone
+
+from .metrics import pipeline_metrics
+from .read_sets import ReadSetProvider
+from .scoring import top_n
 
 
 class SVDModel:
-    def __init__(self, recHelper):
+    def __init__(self, recHelper, read_sets=None):
      
-        self.trainset = recHelper.trainset
-        self.similarity_matrix = recHelper.similarity_matrix
+        self.model = recHelper.model
+        self.read_sets = read_sets if read_sets is not None else ReadSetProvider()
 
-        if self.trainset == None:
-            self.train(recHelper)
+    def fold_in(self, user_id):
+        
+        folded_at = timezone.now()
+        ratings = Rating.objects.filter(user_id=user_id).order_by('id').values_list('book_id', 'rating')
+        self.model.fold_in_user(user_id, list(ratings), folded_at)
 
-        if recHelper.counter == 0:
-            Timer(1, self.train, [recHelper]).start()
-                
-            recHelper.increment_counter()   
+    def fold_in_users(self, user_ids):
 
-    def train(self, recHelper):
-        self.trainset = self.load_dataset().build_full_trainset()
-        recHelper.set_trainset(self.trainset)
+        folded_at = timezone.now()
+        ratings = defaultdict(list)
+        rows = Rating.objects.filter(user_id__in=user_ids).order_by('id').values_list('user_id', 'book_id', 'rating')
+        for user_id, book_id, rating in rows:
+            ratings[user_id].append((book_id, rating))
 
-        self.similarity_matrix = SVD().fit(self.trainset).compute_similarities()
-        recHelper.set_similarity_matrix(self.similarity_matrix)         
+        for user_id in user_ids:
+            self.model.fold_in_user(user_id, ratings[user_id], folded_at)
 
-    def load_dataset(self):
-        
-        self.ratingObjs = Rating.objects.all()
-        user_ids = []
-        book_ids = []
-        ratings = [] 
-
-        for rating in self.ratingObjs:
-            user_ids.append(rating.user.id)
-            book_ids.append(rating.book.id)
-            ratings.append(rating.rating)
-
-        ratings_dict = {'userID': user_ids,
-                        'bookID': book_ids,
-                        'rating': ratings}
-
-        df = pd.DataFrame.from_dict(ratings_dict)
-        reader = Reader(rating_scale = (0, 10))
-        data = Dataset.load_from_df(df[['userID', 'bookID', 'rating']], reader)
+    def refresh_user(self, user_id):
         
-        return data
+        changed = Rating.objects.filter(user_id=user_id, updated_at__gt=self.model.folded_at(user_id))
+        if changed.exists():
+            self.fold_in(user_id)
 
-    def generateCandidates(self, user_id, k=20):
-        
-        user_iid = self.trainset.to_inner_uid(user_id)
-        user_ratings = self.trainset.ur[user_iid]
+    def refresh_users(self, user_ids):
+
+        changed = Rating.objects.filter(user_id__in=user_ids, updated_at__gt=self.model.trained_at)
+        stale = {user_id for user_id, updated_at in changed.values_list('user_id', 'updated_at')
+                 if updated_at > self.model.folded_at(user_id)}
+        if stale:
+            self.fold_in_users(sorted(stale))
+
+    def get_neighbor_rows(self, user_id, k=20):
+
+        user_ratings = self.model.get_user_ratings(user_id)
         k_neighbors = heapq.nlargest(k, user_ratings, key=lambda t: t[1])
 
-        candidates = defaultdict(float)
-        for itemID, rating in k_neighbors:
-            try:
-                similaritities = self.similarity_matrix[itemID]
-                for innerID, score in enumerate(similaritities):
-                    candidates[innerID] += score * (rating/10)
-            except:
-                continue
+        rows = [itemID for itemID, _ in k_neighbors]
+        weights = [rating/10 for _, rating in k_neighbors]
+        return rows, weights
 
-        return candidates
+    def generateCandidates(self, user_id, k=20):
+        
+        rows, weights = self.get_neighbor_rows(user_id, k)
+        return self.model.neighbors.candidates(rows, weights)
 
     def get_recommendations(self, user_id, num_of_rec):
         
-        recommendations = []
-        candidates = self.generateCandidates(user_id)
-        user = User.objects.get(id =user_id )
-        position = 0
-        
-        for itemID, rating_sum in sorted(candidates.items(), key=itemgetter(1), reverse=True):
-            
-            id = self.trainset.to_raw_iid(itemID)
-            if not user.all_books.filter(id=id).exists():
-                recommendations.append(id)
-                position += 1
-                if (position >= num_of_rec): 
-                    break 
+        if self.model is None:
+            return []
+        with pipeline_metrics.stage('fold_in'):
+            self.refresh_user(user_id)
+        with pipeline_metrics.stage('candidates'):
+            items, scores = self.generateCandidates(user_id)
+        pipeline_metrics.count('candidates_scored', len(items))
+        with pipeline_metrics.stage('filtering'):
+            read = self.read_sets.get(user_id).contains(self.model.raw_iids[items])
+        with pipeline_metrics.stage('ranking'):
+            return [self.model.to_raw_iid(items[position]) for position in top_n(scores, num_of_rec, read)]
+
+    def get_recommendations_batch(self, user_ids, num_of_rec):
+        """Return {user id: ranked book ids} for many users at once.
+
+        Ratings that changed since training are folded in, and all read
+        lists are loaded, with one query each. The candidates of all users
+        are then scored in a single vectorised pass; each user gets exactly
+        the list get_recommendations would return. Users unknown to the
+        model, or every user while no model has been trained, get an empty
+        list."""
+        if self.model is None:
+            return {user_id: [] for user_id in user_ids}
+        self.refresh_users(user_ids)
+
+        users, groups, rows, weights = [], [], [], []
+        for user_id in user_ids:
+            try:
+                user_rows, user_weights = self.get_neighbor_rows(user_id)
+            except ValueError:
+                continue
+            groups.extend([len(users)] * len(user_rows))
+            rows.extend(user_rows)
+            weights.extend(user_weights)
+            users.append(user_id)
+
+        owners, items, scores = self.model.neighbors.batch_candidates(groups, rows, weights)
+        pipeline_metrics.count('candidates_scored', len(items))
+        raw_iids = self.model.raw_iids[items]
+        read_sets = self.read_sets.get_many(users)
+        bounds = np.searchsorted(owners, np.arange(len(users) + 1))
+
+        recommendations = {user_id: [] for user_id in user_ids}
+        for position, user_id in enumerate(users):
+            start, end = bounds[position], bounds[position + 1]
+            read = read_sets[user_id].contains(raw_iids[start:end])
+            top = top_n(scores[start:end], num_of_rec, read)
+            recommendations[user_id] = raw_iids[start:end][top].tolist()
+        return recommendations
+
+    def get_club_recommendations(self, member_ids, club_books, num_of_rec):
+        """Rank the catalog for a whole club at once.
+
+        The members' latent vectors are averaged into a single club profile
+        and the best scoring items are looked up in the approximate factor
+        index, so the cost neither grows with the number of members beyond
+        reading their vectors nor scans the whole catalog. Books in the
+        club_books ReadSet are never returned. Returns [] if no member is
+        known to the model or no model has been trained."""
+        if self.model is None:
+            return []
+        self.refresh_users(member_ids)
+
+        factors = []
+        for member_id in member_ids:
+            try:
+                factors.append(self.model.get_user_factors(member_id)[0])
+            except ValueError:
+                continue
 
-        return recommendations 
+        if not factors:
+            return []
 
+        read = self.model.known_inner_iids(club_books.book_ids.tolist())
+        items = self.model.factor_index.search(np.mean(factors, axis=0), num_of_rec, settings.RECOMMENDER_ANN_NPROBE, read)
+        return self.model.raw_iids[items].tolist()
@@ -0,0 +1,113 @@
+import numpy as np
+from bookclub.models import Book, Club, User
+from scipy.sparse import coo_matrix, csr_matrix
+
+# How much each implicit signal counts towards a user's interest in a book:
+# the book is on their reading list, they are one of its readers, or it is
+# one of the books of a club they are a member of
+READING_LIST_WEIGHT = 1.0
+READER_WEIGHT = 1.0
+CLUB_WEIGHT = 0.5
+
+
+def load_interactions(user_ids=None):
+    """Return the implicit signals as (user_ids, book_ids, weights) arrays.
+
+    Reads the User.all_books, Book.readers and Book.clubs through-tables
+    with one values_list query each; club books count for every member of
+    the club. A user and book pair appears once per signal. Pass user_ids
+    to only load the signals of those users."""
+    reading_list = User.all_books.through.objects.all()
+    readers = Book.readers.through.objects.all()
+    club_books = Club.members.through.objects.filter(club__books__isnull=False)
+    if user_ids is not None:
+        reading_list = reading_list.filter(user_id__in=user_ids)
+        readers = readers.filter(user_id__in=user_ids)
+        club_books = club_books.filter(user_id__in=user_ids)
+
+    signals = [
+        (reading_list.values_list('user_id', 'book_id'), READING_LIST_WEIGHT),
+        (readers.values_list('user_id', 'book_id'), READER_WEIGHT),
+        (club_books.values_list('user_id', 'club__books'), CLUB_WEIGHT),
+    ]
+    pairs, weights = [], []
+    for rows, weight in signals:
+        rows = list(rows)
+        pairs.extend(rows)
+        weights.append(np.full(len(rows), weight))
+
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1], np.concatenate(weights)
+
+def interaction_matrix(user_ids, book_ids, weights):
+    """Build the user x book matrix of summed signal weights.
+
+    Returns the sorted raw user ids, the sorted raw book ids and the CSR
+    matrix whose rows and columns follow them."""
+    raw_uids, rows = np.unique(user_ids, return_inverse=True)
+    raw_iids, columns = np.unique(book_ids, return_inverse=True)
+    matrix = coo_matrix((weights, (rows.ravel(), columns.ravel())), shape=(raw_uids.size, raw_iids.size)).tocsr()
+    matrix.sum_duplicates()
+    return raw_uids, raw_iids, matrix
+
+def fit_als(interactions, n_factors=32, reg=0.1, alpha=40.0, n_iter=15, cg_steps=3, seed=0):
+    """Fit implicit-feedback ALS (Hu, Koren and Volinsky) to an interaction matrix.
+
+    Every stored weight w is a preference of 1 with confidence 1 + alpha * w;
+    missing entries are preferences of 0 with confidence 1. Each sweep
+    updates all user factors and then all item factors with a few warm
+    started conjugate gradient steps instead of an exact solve per row.
+    Returns the user and item factors."""
+    rng = np.random.default_rng(seed)
+    n_users, n_items = interactions.shape
+    user_factors = rng.normal(scale=0.01, size=(n_users, n_factors))
+    item_factors = rng.normal(scale=0.01, size=(n_items, n_factors))
+
+    confidence = csr_matrix(interactions * alpha)
+    transposed = csr_matrix(confidence.T)
+    for _ in range(n_iter):
+        user_factors = conjugate_gradient(confidence, item_factors, user_factors, reg, cg_steps)
+        item_factors = conjugate_gradient(transposed, user_factors, item_factors, reg, cg_steps)
+    return user_factors, item_factors
+
+def conjugate_gradient(confidence, fixed, factors, reg, steps):
+    """Run CG steps on the normal equations of every row at once.
+
+    Row u solves (F^T C_u F + reg I) x_u = F^T C_u p_u, where F holds the
+    fixed factors and confidence holds c_ui - 1 for the rows' stored
+    entries. F^T C_u F is applied as F^T F plus a correction over the
+    stored entries only, so a step costs one sparse product with F rather
+    than a k x k system per row."""
+    gram = fixed.T @ fixed + reg * np.eye(fixed.shape[1])
+    rows = np.repeat(np.arange(confidence.shape[0]), np.diff(confidence.indptr))
+
+    def apply(vectors):
+        dots = np.einsum('ij,ij->i', vectors[rows], fixed[confidence.indices]) * confidence.data
+        return vectors @ gram + csr_matrix((dots, confidence.indices, confidence.indptr), shape=confidence.shape) @ fixed
+
+    targets = csr_matrix((confidence.data + 1, confidence.indices, confidence.indptr), shape=confidence.shape) @ fixed
+    factors = factors.copy()
+    residuals = targets - apply(factors)
+    directions = residuals.copy()
+    norms = np.einsum('ij,ij->i', residuals, residuals)
+
+    for _ in range(steps):
+        products = apply(directions)
+        curvature = np.einsum('ij,ij->i', directions, products)
+        step = np.divide(norms, curvature, out=np.zeros_like(norms), where=curvature > 0)
+        factors += step[:, None] * directions
+        residuals -= step[:, None] * products
+        new_norms = np.einsum('ij,ij->i', residuals, residuals)
+        ratio = np.divide(new_norms, norms, out=np.zeros_like(norms), where=norms > 0)
+        directions = residuals + ratio[:, None] * directions
+        norms = new_norms
+    return factors
+
+def solve_user(item_factors, gram, items, confidence, reg=0.1):
+    """Solve one user's factors exactly against fixed item factors.
+
+    items are the inner ids of the books the user interacted with and
+    confidence their c_ui - 1; gram is item_factors^T item_factors."""
+    selected = item_factors[items]
+    normal = gram + (selected.T * confidence) @ selected + reg * np.eye(gram.shape[0])
+    return np.linalg.solve(normal, selected.T @ (confidence + 1))
@@ -0,0 +1,94 @@
+import numpy as np
+
+from .scoring import top_n
+
+
+class FactorIndex:
+    """Inverted file (IVF) index for top-N search over SVD item scores.
+
+    An item's score for a query vector q is factors[item] @ q + biases[item].
+    Items are clustered with k-means on their [factors, bias] vectors and
+    stored list by list in CSR layout: the items of list c are
+    items[indptr[c]:indptr[c + 1]]. A query only scores the items of the
+    nprobe lists whose centroids score best, so its cost grows with about
+    nprobe * n_items / n_lists instead of n_items. Raising nprobe trades
+    latency for recall; probing every list is exact."""
+
+    def __init__(self, factors, biases, centroids, indptr, items):
+        self.factors = factors
+        self.biases = biases
+        self.centroids = centroids
+        self.indptr = indptr
+        self.items = items
+
+    @property
+    def n_lists(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_factors(cls, factors, biases, n_lists=None, n_iter=10, seed=0):
+        """Cluster the items into n_lists lists (sqrt(n_items) by default)."""
+        vectors = np.hstack([np.asarray(factors, dtype=np.float64), np.asarray(biases, dtype=np.float64)[:, None]])
+        n_items = vectors.shape[0]
+        if n_items == 0:
+            return cls(factors, biases, np.zeros((0, vectors.shape[1])), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_items))
+        n_lists = max(1, min(n_lists, n_items))
+
+        centroids, assignment = kmeans(vectors, n_lists, n_iter, seed)
+        indptr = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=indptr[1:])
+        items = np.argsort(assignment, kind='stable').astype(np.int64)
+        return cls(factors, biases, centroids, indptr, items)
+
+    def probe(self, query, n, nprobe, exclude=None):
+        """Return the sorted candidate items of the best scoring lists.
+
+        At least nprobe lists are read, and more if needed to find n items
+        that are not in the exclude array."""
+        if self.n_lists == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        n_excluded = 0 if exclude is None else len(exclude)
+        order = np.argsort(-(self.centroids @ np.append(query, 1.0)), kind='stable')
+        sizes = np.cumsum(self.indptr[order + 1] - self.indptr[order])
+        needed = int(np.searchsorted(sizes, n + n_excluded)) + 1
+        probed = min(max(nprobe, needed, 1), order.size)
+
+        candidates = np.sort(np.concatenate([self.items[self.indptr[c]:self.indptr[c + 1]] for c in order[:probed]]))
+        if n_excluded:
+            candidates = candidates[~np.isin(candidates, exclude)]
+        return candidates
+
+    def search(self, query, n, nprobe, exclude=None):
+        """Return the (approximately) n best scoring items for query, best first.
+
+        Items in exclude are never returned. Equal scores are ordered by
+        ascending item, like an exact top_n over every item."""
+        query = np.asarray(query, dtype=np.float64)
+        candidates = self.probe(query, n, nprobe, exclude)
+        scores = self.factors[candidates] @ query + self.biases[candidates]
+        return candidates[top_n(scores, n)]
+
+
+def kmeans(vectors, n_clusters, n_iter=10, seed=0):
+    """Lloyd's k-means; returns the centroids and the cluster of every vector."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], size=n_clusters, replace=False)].copy()
+    squared_norms = (vectors * vectors).sum(axis=1)
+
+    for _ in range(n_iter):
+        assignment = nearest(vectors, squared_norms, centroids)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+    return centroids, nearest(vectors, squared_norms, centroids)
+
+
+def nearest(vectors, squared_norms, centroids):
+    distances = squared_norms[:, None] - 2 * vectors @ centroids.T + (centroids * centroids).sum(axis=1)
+    return np.argmin(distances, axis=1)
@@ -0,0 +1,299 @@
+import json
+import os
+import shutil
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .ann import FactorIndex
+from .neighbors import ItemNeighborIndex
+
+FoldedUser = namedtuple('FoldedUser', ['ratings', 'factors', 'bias', 'folded_at'])
+
+
+class ModelArtifact:
+    """Trained recommender model stored as plain NumPy arrays.
+
+    The arrays can be loaded memory-mapped from a versioned directory, or
+    attached from shared memory, so that every worker process shares the
+    same pages. Raw ids are looked up by binary search in sorted arrays
+    rather than in per-process dictionaries."""
+
+    ARRAYS = (
+        'raw_uids',
+        'raw_iids',
+        'sorted_raw_uids',
+        'sorted_inner_uids',
+        'sorted_raw_iids',
+        'sorted_inner_iids',
+        'ur_indptr',
+        'ur_indices',
+        'ur_ratings',
+        'neighbor_indptr',
+        'neighbor_indices',
+        'neighbor_scores',
+        'user_factors',
+        'item_factors',
+        'user_biases',
+        'item_biases',
+        'ann_centroids',
+        'ann_indptr',
+        'ann_items',
+        'als_raw_iids',
+        'als_item_factors',
+        'als_gram',
+    )
+
+    def __init__(self, version, arrays, global_mean, trained_at):
+        self.version = version
+        self.global_mean = global_mean
+        self.trained_at = trained_at
+        for name in self.ARRAYS:
+            array = arrays[name]
+            array.flags.writeable = False
+            setattr(self, name, array)
+
+        self.n_users = len(self.raw_uids)
+        self.n_items = len(self.raw_iids)
+        self.neighbors = ItemNeighborIndex(self.neighbor_indptr, self.neighbor_indices, self.neighbor_scores)
+        self.factor_index = FactorIndex(self.item_factors, self.item_biases, self.ann_centroids, self.ann_indptr, self.ann_items)
+        self._folded_users = {}
+        self.readers = 0
+        self.retired = False
+        # Shared memory segment the arrays live in, if any; closed on release
+        self.segment = None
+
+    @classmethod
+    def from_trainset(cls, trainset, algo, trained_at, n_neighbors=50, ann_lists=None, implicit=None):
+        """Build an artifact from a surprise trainset and its fitted SVD.
+
+        trained_at is when the training data was read; ratings changed after
+        it are not part of the model. The item neighbour index keeps the
+        n_neighbors most similar items of every book, and the item factors
+        are clustered into ann_lists lists for approximate top-N search.
+        implicit is an optional (sorted raw book ids, item factors) pair of
+        the implicit-feedback ALS model."""
+        ur_indptr = np.zeros(trainset.n_users + 1, dtype=np.int64)
+        ur_indices = []
+        ur_ratings = []
+        for inner_uid in range(trainset.n_users):
+            ratings = trainset.ur[inner_uid]
+            ur_indptr[inner_uid + 1] = ur_indptr[inner_uid] + len(ratings)
+            ur_indices.extend(iid for iid, _ in ratings)
+            ur_ratings.extend(rating for _, rating in ratings)
+
+        ur_indices = np.array(ur_indices, dtype=np.int64)
+        ur_ratings = np.array(ur_ratings, dtype=np.float64)
+        neighbors = ItemNeighborIndex.from_ratings(
+            csr_matrix((ur_ratings, ur_indices, ur_indptr), shape=(trainset.n_users, trainset.n_items)),
+            k=n_neighbors
+        )
+
+        item_factors = np.asarray(algo.qi, dtype=np.float64)
+        item_biases = np.asarray(algo.bi, dtype=np.float64)
+        factor_index = FactorIndex.from_factors(item_factors, item_biases, n_lists=ann_lists)
+
+        if implicit is None:
+            implicit = (np.zeros(0, dtype=np.int64), np.zeros((0, 0)))
+        als_raw_iids = np.asarray(implicit[0], dtype=np.int64)
+        als_item_factors = np.asarray(implicit[1], dtype=np.float64)
+
+        raw_uids = np.array([trainset.to_raw_uid(uid) for uid in range(trainset.n_users)], dtype=np.int64)
+        raw_iids = np.array([trainset.to_raw_iid(iid) for iid in range(trainset.n_items)], dtype=np.int64)
+        uid_order = np.argsort(raw_uids, kind='stable')
+        iid_order = np.argsort(raw_iids, kind='stable')
+
+        arrays = {
+            'raw_uids': raw_uids,
+            'raw_iids': raw_iids,
+            'sorted_raw_uids': raw_uids[uid_order],
+            'sorted_inner_uids': uid_order.astype(np.int64),
+            'sorted_raw_iids': raw_iids[iid_order],
+            'sorted_inner_iids': iid_order.astype(np.int64),
+            'ur_indptr': ur_indptr,
+            'ur_indices': ur_indices,
+            'ur_ratings': ur_ratings,
+            'neighbor_indptr': neighbors.indptr,
+            'neighbor_indices': neighbors.indices,
+            'neighbor_scores': neighbors.scores,
+            'user_factors': np.asarray(algo.pu, dtype=np.float64),
+            'item_factors': item_factors,
+            'user_biases': np.asarray(algo.bu, dtype=np.float64),
+            'item_biases': item_biases,
+            'ann_centroids': factor_index.centroids,
+            'ann_indptr': factor_index.indptr,
+            'ann_items': factor_index.items,
+            'als_raw_iids': als_raw_iids,
+            'als_item_factors': als_item_factors,
+            'als_gram': als_item_factors.T @ als_item_factors,
+        }
+        return cls(new_version(), arrays, float(trainset.global_mean), trained_at)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load the artifact saved in the given version directory."""
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+
+        arrays = {}
+        for name in cls.ARRAYS:
+            arrays[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+        return cls(meta['version'], arrays, meta['global_mean'], datetime.fromisoformat(meta['trained_at']))
+
+    def save(self, root, keep=3):
+        """Write the artifact to root/<version> and prune older versions.
+
+        Files are written to a temporary directory first and renamed into
+        place so readers never see a half-written version."""
+        os.makedirs(root, exist_ok=True)
+        path = os.path.join(root, self.version)
+        tmp_path = os.path.join(root, f'.tmp-{self.version}')
+        os.makedirs(tmp_path)
+
+        for name in self.ARRAYS:
+            np.save(os.path.join(tmp_path, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as meta_file:
+            json.dump({
+                'version': self.version,
+                'global_mean': self.global_mean,
+                'trained_at': self.trained_at.isoformat(),
+            }, meta_file)
+
+        os.rename(tmp_path, path)
+        for old_version in list_versions(root)[:-keep]:
+            shutil.rmtree(os.path.join(root, old_version), ignore_errors=True)
+        return path
+
+    def to_inner_uid(self, raw_uid):
+        inner_uid = _lookup(self.sorted_raw_uids, self.sorted_inner_uids, [raw_uid])[0]
+        if inner_uid < 0:
+            raise ValueError(f'User {raw_uid} is not part of the trainset.')
+        return int(inner_uid)
+
+    def to_inner_iid(self, raw_iid):
+        inner_iid = _lookup(self.sorted_raw_iids, self.sorted_inner_iids, [raw_iid])[0]
+        if inner_iid < 0:
+            raise ValueError(f'Item {raw_iid} is not part of the trainset.')
+        return int(inner_iid)
+
+    def to_inner_iids(self, raw_iids):
+        """Map many raw book ids at once; books the model does not know map to -1."""
+        return _lookup(self.sorted_raw_iids, self.sorted_inner_iids, raw_iids)
+
+    def to_als_iids(self, raw_iids):
+        """Map raw book ids to rows of the ALS item factors; unknown books map to -1."""
+        raw_iids = np.asarray(raw_iids, dtype=np.int64)
+        if self.als_raw_iids.size == 0:
+            return np.full(raw_iids.shape, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.als_raw_iids, raw_iids), self.als_raw_iids.size - 1)
+        return np.where(self.als_raw_iids[positions] == raw_iids, positions, -1)
+
+    def knows_user(self, raw_uid):
+        return _lookup(self.sorted_raw_uids, self.sorted_inner_uids, [raw_uid])[0] >= 0
+
+    def known_inner_iids(self, raw_iids):
+        """Return the sorted inner ids of the given books, skipping books the model does not know."""
+        inner_iids = self.to_inner_iids(raw_iids)
+        return np.sort(inner_iids[inner_iids >= 0])
+
+    def to_raw_iid(self, inner_iid):
+        return int(self.raw_iids[inner_iid])
+
+    def user_ratings(self, inner_uid):
+        """Return the (inner item id, rating) pairs of a user, like trainset.ur."""
+        start, end = self.ur_indptr[inner_uid], self.ur_indptr[inner_uid + 1]
+        return list(zip(self.ur_indices[start:end].tolist(), self.ur_ratings[start:end].tolist()))
+
+    def get_user_ratings(self, raw_uid):
+        """Return a user's (inner item id, rating) pairs, including folded-in ratings."""
+        folded = self._folded_users.get(raw_uid)
+        if folded is not None:
+            return folded.ratings
+        return self.user_ratings(self.to_inner_uid(raw_uid))
+
+    def get_user_factors(self, raw_uid):
+        """Return a user's latent vector and bias, including folded-in updates."""
+        folded = self._folded_users.get(raw_uid)
+        if folded is not None:
+            return folded.factors, folded.bias
+        inner_uid = self.to_inner_uid(raw_uid)
+        return self.user_factors[inner_uid], float(self.user_biases[inner_uid])
+
+    def folded_at(self, raw_uid):
+        """Return the time up to which the model reflects this user's ratings."""
+        folded = self._folded_users.get(raw_uid)
+        if folded is not None:
+            return folded.folded_at
+        return self.trained_at
+
+    def release(self):
+        """Drop the arrays and fold-in state of a snapshot nobody reads any more.
+
+        Memory-mapped pages are unmapped once the arrays are garbage
+        collected; a shared memory segment is closed straight away, unless
+        a caller still holds one of its arrays, in which case it is closed
+        when collected."""
+        for name in self.ARRAYS:
+            setattr(self, name, None)
+        self.neighbors = None
+        self.factor_index = None
+        self._folded_users = {}
+        if self.segment is not None:
+            try:
+                self.segment.close()
+            except BufferError:
+                pass
+            self.segment = None
+
+    def fold_in_user(self, raw_uid, ratings, folded_at, reg=0.02):
+        """Fold a user's current ratings into the model without a full refit.
+
+        The item factors and biases stay fixed and the user's latent vector and
+        bias are re-solved in closed form (one regularised least-squares ALS
+        step), which is the optimum SGD on that user alone converges to.
+        Ratings of books that are not part of the model are ignored."""
+        inner_iids = self.to_inner_iids([raw_iid for raw_iid, _ in ratings])
+        known = [(int(inner_iid), float(rating)) for inner_iid, (_, rating) in zip(inner_iids, ratings) if inner_iid >= 0]
+        factors = np.zeros(self.item_factors.shape[1])
+        bias = 0.0
+
+        if known:
+            inner_iids = np.array([inner_iid for inner_iid, _ in known])
+            values = np.array([rating for _, rating in known])
+            design = np.hstack([self.item_factors[inner_iids], np.ones((len(known), 1))])
+            residuals = values - self.global_mean - self.item_biases[inner_iids]
+            normal = design.T @ design + reg * len(known) * np.eye(design.shape[1])
+            solution = np.linalg.solve(normal, design.T @ residuals)
+            factors, bias = solution[:-1], float(solution[-1])
+
+        self._folded_users[raw_uid] = FoldedUser(known, factors, bias, folded_at)
+
+
+def _lookup(sorted_raw, sorted_inner, raw_ids):
+    """Binary search raw ids in a sorted id array; unknown ids map to -1."""
+    raw_ids = np.asarray(raw_ids, dtype=np.int64)
+    if sorted_raw.size == 0:
+        return np.full(raw_ids.shape, -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_raw, raw_ids), sorted_raw.size - 1)
+    return np.where(sorted_raw[positions] == raw_ids, sorted_inner[positions], -1)
+
+
+def new_version():
+    return datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+
+
+def list_versions(root):
+    """Return the saved versions in root, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith('.') and os.path.isfile(os.path.join(root, name, 'meta.json')))
+
+
+def latest_artifact_path(root):
+    versions = list_versions(root)
+    if not versions:
+        return None
+    return os.path.join(root, versions[-1])
@@ -0,0 +1,138 @@
+import math
+import threading
+import time
+
+import numpy as np
+from bookclub.models import Book, Genre
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+class GenreIndex:
+    """Inverted index from genre to the sorted ids of the books listed under it.
+
+    The genre similarity of two books is the cosine of their genre
+    indicator vectors: the number of genres they share divided by the
+    square root of the product of their genre counts. Only books sharing a
+    genre with the seed can score above 0, so candidates are read from the
+    seed's posting lists and the shared counts fall out of merging them;
+    the cost grows with the overlap rather than the catalog.
+
+    Book saves and deletes in this process update the postings in place;
+    changes made elsewhere, such as by other workers, are picked up when
+    the index is rebuilt after ttl seconds."""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._postings = {}
+        self._genres = {}
+
+    def reload(self):
+        """Rebuild the index from the Book-Genre links with one query."""
+        book_ids = {}
+        genres = {}
+        for book_id, name in Book.objects.order_by().values_list('id', 'genres__name'):
+            genres.setdefault(book_id, set())
+            if name is not None:
+                genres[book_id].add(name)
+                book_ids.setdefault(name, []).append(book_id)
+
+        with self._lock:
+            self._postings = {name: np.sort(np.array(ids, dtype=np.int64)) for name, ids in book_ids.items()}
+            self._genres = {book_id: frozenset(names) for book_id, names in genres.items()}
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, book_ids=()):
+        if (self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+                or any(book_id not in self._genres for book_id in book_ids)):
+            self.reload()
+
+    def book_changed(self, sender, instance, **kwargs):
+        """post_save receiver: move the book to the posting lists of its current genres."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            genres = frozenset(Genre.names_from(instance.genre))
+            old_genres = self._genres.get(instance.id, frozenset())
+            if genres == old_genres:
+                return
+
+            for name in old_genres - genres:
+                self._remove_posting(name, instance.id)
+            for name in genres - old_genres:
+                postings = self._postings.get(name, np.zeros(0, dtype=np.int64))
+                self._postings[name] = np.insert(postings, np.searchsorted(postings, instance.id), instance.id)
+            self._genres[instance.id] = genres
+
+    def book_deleted(self, sender, instance, **kwargs):
+        """post_delete receiver: drop the book from its posting lists."""
+        with self._lock:
+            for name in self._genres.pop(instance.id, ()):
+                self._remove_posting(name, instance.id)
+
+    def _remove_posting(self, name, book_id):
+        postings = np.delete(self._postings[name], np.searchsorted(self._postings[name], book_id))
+        if postings.size:
+            self._postings[name] = postings
+        else:
+            del self._postings[name]
+
+    def genres(self, book_id):
+        """Return the genres of a book, or None if there is no such book."""
+        self._ensure_loaded([book_id])
+        return self._genres.get(book_id)
+
+    def similarities(self, book_id):
+        """Return (book ids, cosine similarities) of the books sharing a genre with book_id.
+
+        The ids are sorted and include book_id itself."""
+        return self.profile_similarities([book_id])
+
+    def profile_similarities(self, book_ids, aggregate='sum'):
+        """Return (book ids, scores) of the books sharing a genre with any of book_ids.
+
+        With 'sum' a book scores the sum of its cosines to the seed books.
+        Cosine is linear in the normalised genre vectors, so each posting
+        list is read once with the summed weight of the seeds listing that
+        genre, whatever their number. With 'max' a book scores its best
+        cosine to any seed book. Seeds that are not books are ignored."""
+        self._ensure_loaded(book_ids)
+        with self._lock:
+            seeds = [self._genres[book_id] for book_id in book_ids if book_id in self._genres]
+            if aggregate == 'max':
+                scores = [self._scores({name: 1 / math.sqrt(len(genres)) for name in genres}) for genres in seeds]
+            else:
+                profile = {}
+                for genres in seeds:
+                    for name in genres:
+                        profile[name] = profile.get(name, 0.0) + 1 / math.sqrt(len(genres))
+                scores = [self._scores(profile)]
+
+        if not seeds:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        candidates, inverse = np.unique(np.concatenate([ids for ids, _ in scores]), return_inverse=True)
+        best = np.zeros(candidates.size)
+        np.maximum.at(best, inverse.ravel(), np.concatenate([values for _, values in scores]))
+        return candidates, best
+
+    def _scores(self, profile):
+        """Score the books listed under the genres of a weighted profile.
+
+        A book scores the summed profile weights of its genres divided by
+        the square root of its genre count."""
+        if not profile:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        postings = [self._postings[name] for name in profile]
+        weights = [np.full(ids.size, profile[name]) for name, ids in zip(profile, postings)]
+        candidates, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        shared = np.bincount(inverse.ravel(), np.concatenate(weights), minlength=candidates.size)
+        lengths = np.fromiter((len(self._genres[book_id]) for book_id in candidates.tolist()),
+                              dtype=np.float64, count=candidates.size)
+        return candidates, shared / np.sqrt(lengths)
+
+
+genre_index = GenreIndex(settings.RECOMMENDER_GENRE_TTL)
+post_save.connect(genre_index.book_changed, sender=Book)
+post_delete.connect(genre_index.book_deleted, sender=Book)
@@ -0,0 +1,13 @@
+from bookclub.models import Book
+
+# Book columns rendered by the recommendation cards and lists
+BOOK_CARD_FIELDS = ('id', 'title', 'author', 'image_url', 'description')
+
+
+def hydrate_books(book_ids, fields=BOOK_CARD_FIELDS):
+    """Return the books with the given ids, in the same order, with one query.
+
+    Only the given columns are loaded. Ids of books that no longer exist are
+    skipped."""
+    books = Book.objects.only(*fields).in_bulk(book_ids)
+    return [books[book_id] for book_id in book_ids if book_id in books]
@@ -0,0 +1,123 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bookclub.models import UserRecommendation
+from django.conf import settings
+from django.db import IntegrityError, connections
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .hydration import hydrate_books
+from .metrics import pipeline_metrics
+from .recommendation import Recommendation
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationRefresher:
+    """Keeps the materialized UserRecommendation rows up to date.
+
+    Pages read a user's precomputed list with a single indexed query. Rating
+    saves, reading list changes and retrains only mark rows stale; the stale
+    list keeps being served while a background worker recomputes it."""
+
+    def __init__(self, recHelper, background=True):
+        self.rec_helper = recHelper
+        self.background = background
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def compute(self, user_id):
+        """Run the recommender for a user and return the ranked book ids."""
+        books = Recommendation(True, self.rec_helper).get_recommendations(
+            None, settings.RECOMMENDER_MATERIALIZED_SIZE, user_id=user_id
+        )
+        return [book.id for book in books]
+
+    def refresh(self, user_id):
+        """Recompute and store a user's recommendations."""
+        with self.rec_helper.pin():
+            started_at = timezone.now()
+            book_ids = self.compute(user_id)
+            self.store(user_id, book_ids, started_at)
+        return book_ids
+
+    def store(self, user_id, book_ids, started_at):
+        """Save a recomputed list.
+
+        The row only stops being stale if it was not invalidated again after
+        started_at, while the list was being computed."""
+        model = self.rec_helper.model
+        values = {
+            'book_ids': book_ids,
+            'computed_at': started_at,
+            'model_version': model.version if model is not None else '',
+        }
+
+        updated = UserRecommendation.objects.filter(user_id=user_id).update(
+            is_stale=Case(When(Q(invalidated_at__gt=started_at), then=Value(True)), default=Value(False)),
+            **values
+        )
+        if not updated:
+            try:
+                UserRecommendation.objects.create(user_id=user_id, **values)
+            except IntegrityError:
+                UserRecommendation.objects.filter(user_id=user_id).update(**values)
+
+    def request_refresh(self, user_id):
+        """Queue a user's recommendations for recomputation."""
+        if not self.background:
+            self.refresh(user_id)
+            return
+
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+        self._executor.submit(self._refresh_in_background, user_id)
+
+    def _refresh_in_background(self, user_id):
+        try:
+            self.refresh(user_id)
+        except Exception:
+            logger.exception('Refreshing recommendations of user %s failed.', user_id)
+        finally:
+            with self._lock:
+                self._pending.discard(user_id)
+            connections.close_all()
+
+    def get_book_ids(self, user_id, num_of_rec):
+        """Return a user's top recommended book ids from the materialized store.
+
+        A user without a stored list gets it computed on the spot; a stale
+        list is served as is and refreshed in the background."""
+        with pipeline_metrics.stage('materialized_read'):
+            entry = UserRecommendation.objects.filter(user_id=user_id).only('book_ids', 'is_stale').first()
+        if entry is None:
+            return self.refresh(user_id)[:num_of_rec]
+
+        if entry.is_stale:
+            self.request_refresh(user_id)
+        return entry.book_ids[:num_of_rec]
+
+    def get_books(self, user_id, num_of_rec):
+        book_ids = self.get_book_ids(user_id, num_of_rec)
+        with pipeline_metrics.stage('hydration'):
+            return hydrate_books(book_ids)
+
+    def refresh_many(self, user_ids):
+        """Recompute the lists of many users with one batch recommender pass."""
+        with self.rec_helper.pin():
+            started_at = timezone.now()
+            recommendations = Recommendation(True, self.rec_helper).get_recommendations_batch(
+                user_ids, settings.RECOMMENDER_MATERIALIZED_SIZE
+            )
+            for user_id in user_ids:
+                self.store(user_id, recommendations[user_id], started_at)
+        return len(user_ids)
+
+    def refresh_stale(self):
+        """Synchronously recompute every stale list; return how many were refreshed."""
+        return self.refresh_many(list(UserRecommendation.objects.filter(is_stale=True).values_list('user_id', flat=True)))
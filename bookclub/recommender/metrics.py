@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+PERCENTILES = (50, 95, 99)
+
+
+class PipelineMetrics:
+    """Per-stage latency and query counters for the recommendation pipeline.
+
+    Every stage keeps its call count, total queries and a window of its most
+    recent durations, from which p50/p95/p99 are computed on read. Named
+    counters such as candidates scored are plain totals. Recording costs two
+    perf_counter calls and a few appends, so it stays on in production.
+
+    Each process periodically writes its numbers to a file in the metrics
+    directory; summary() merges every process's file."""
+
+    def __init__(self, window=1024, directory=None, flush_interval=10):
+        self.window = window
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = defaultdict(lambda: deque(maxlen=self.window))
+            self._calls = defaultdict(int)
+            self._queries = defaultdict(int)
+            self._counters = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage and count the database queries it issues."""
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            local.queries = 0
+            wrapper = connection.execute_wrapper(self._count_query)
+            wrapper.__enter__()
+
+        local.depth = depth + 1
+        queries_before = local.queries
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            local.depth = depth
+            if depth == 0:
+                wrapper.__exit__(None, None, None)
+            with self._lock:
+                self._durations[name].append(duration)
+                self._calls[name] += 1
+                self._queries[name] += local.queries - queries_before
+            if depth == 0:
+                self.maybe_flush()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self._local.queries += 1
+        return execute(sql, params, many, context)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self):
+        """Return this process's raw numbers as a JSON-serialisable dict."""
+        with self._lock:
+            return {
+                'stages': {
+                    name: {
+                        'calls': self._calls[name],
+                        'queries': self._queries[name],
+                        'durations': list(durations),
+                    }
+                    for name, durations in self._durations.items()
+                },
+                'counters': dict(self._counters),
+            }
+
+    def maybe_flush(self):
+        if self.directory is None or time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        self.flush()
+
+    def flush(self):
+        """Write this process's numbers to <directory>/<pid>.json."""
+        if self.directory is None:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp_path = os.path.join(self.directory, f'.{os.getpid()}.json')
+        with open(tmp_path, 'w') as metrics_file:
+            json.dump(self.snapshot(), metrics_file)
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        """Merge the numbers of every process into per-stage statistics.
+
+        Durations are reported in milliseconds."""
+        self.flush()
+        snapshots = [self.snapshot()] if self.directory is None else list(self._read_snapshots())
+
+        stages = defaultdict(lambda: {'calls': 0, 'queries': 0, 'durations': []})
+        counters = defaultdict(int)
+        for snapshot in snapshots:
+            for name, stage in snapshot['stages'].items():
+                stages[name]['calls'] += stage['calls']
+                stages[name]['queries'] += stage['queries']
+                stages[name]['durations'].extend(stage['durations'])
+            for name, value in snapshot['counters'].items():
+                counters[name] += value
+
+        summary = {'stages': {}, 'counters': dict(counters)}
+        for name, stage in sorted(stages.items()):
+            durations = np.array(stage['durations']) * 1000
+            percentiles = np.percentile(durations, PERCENTILES) if durations.size else [0.0] * len(PERCENTILES)
+            summary['stages'][name] = {
+                'calls': stage['calls'],
+                'queries_per_call': stage['queries'] / stage['calls'] if stage['calls'] else 0.0,
+                **{f'p{percentile}_ms': float(value) for percentile, value in zip(PERCENTILES, percentiles)},
+            }
+        return summary
+
+    def _read_snapshots(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith('.') or not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as metrics_file:
+                    yield json.load(metrics_file)
+            except (OSError, ValueError):
+                continue
+
+    def clear(self):
+        """Reset this process and delete every process's metrics file."""
+        self.reset()
+        if self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+pipeline_metrics = PipelineMetrics(
+    window=settings.RECOMMENDER_METRICS_WINDOW,
+    directory=settings.RECOMMENDER_METRICS_DIR,
+    flush_interval=settings.RECOMMENDER_METRICS_FLUSH_INTERVAL
+)
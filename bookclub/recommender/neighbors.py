@@ -0,0 +1,113 @@
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+# Upper bound on the number of similarity cells computed at once while building
+BLOCK_CELLS = 4_000_000
+
+
+class ItemNeighborIndex:
+    """The K most similar items of every item, in CSR layout.
+
+    Row i of the index lists the inner ids of the items most similar to item
+    i in indices[indptr[i]:indptr[i + 1]], best first, with their float32
+    similarity scores alongside. Memory grows with n_items * K instead of
+    n_items ** 2."""
+
+    def __init__(self, indptr, indices, scores):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+
+    @property
+    def n_items(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_ratings(cls, user_item_ratings, k=50):
+        """Build the index from a users x items sparse rating matrix.
+
+        Similarity is the cosine between item rating columns. It is computed
+        one block of items at a time, so the full item x item matrix never
+        exists in memory; only positive similarities are kept."""
+        items = csr_matrix(user_item_ratings, dtype=np.float64).T.tocsr()
+        n_items = items.shape[0]
+        norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+        inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        items = diags(inverse_norms) @ items
+        items_t = items.T.tocsc()
+
+        k = max(0, min(k, n_items - 1))
+        block_size = max(1, BLOCK_CELLS // max(n_items, 1))
+        counts = np.zeros(n_items, dtype=np.int64)
+        block_indices = []
+        block_scores = []
+
+        for start in range(0, n_items, block_size):
+            end = min(start + block_size, n_items)
+            rows = np.arange(end - start)
+            similarities = (items[start:end] @ items_t).toarray()
+            similarities[rows, np.arange(start, end)] = -np.inf
+
+            if k == 0:
+                top = np.empty((end - start, 0), dtype=np.int64)
+            else:
+                top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.lexsort((top, -top_scores), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            keep = top_scores > 0
+            counts[start:end] = keep.sum(axis=1)
+            block_indices.append(top[keep])
+            block_scores.append(top_scores[keep])
+
+        indptr = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.concatenate(block_indices).astype(np.int32) if block_indices else np.zeros(0, dtype=np.int32)
+        scores = np.concatenate(block_scores).astype(np.float32) if block_scores else np.zeros(0, dtype=np.float32)
+        return cls(indptr, indices, scores)
+
+    def neighbors(self, inner_iid):
+        start, end = self.indptr[inner_iid], self.indptr[inner_iid + 1]
+        return self.indices[start:end], self.scores[start:end]
+
+    def candidates(self, rows, weights):
+        """Return the candidate items of the given rows and their weighted scores.
+
+        Only the neighbours of the given rows are touched, so the cost is
+        O(len(rows) * K) however large the catalog is. Candidates come back
+        sorted by inner id."""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        neighbors, weighted, _ = self._gather(rows, weights)
+        items, positions = np.unique(neighbors, return_inverse=True)
+        totals = np.bincount(positions.ravel(), weights=weighted, minlength=items.size)
+        return items.astype(np.int64), totals
+
+    def batch_candidates(self, groups, rows, weights):
+        """Score the candidates of many users in one pass.
+
+        groups[j] is the user that rows[j] and weights[j] belong to. Returns
+        (groups, items, totals) sorted by group and then inner id; every
+        user's slice holds exactly what candidates() returns for that user."""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        neighbors, weighted, lengths = self._gather(rows, weights)
+        owners = np.repeat(np.asarray(groups, dtype=np.int64), lengths)
+        keys, positions = np.unique(owners * self.n_items + neighbors, return_inverse=True)
+        totals = np.bincount(positions.ravel(), weights=weighted, minlength=keys.size)
+        return keys // self.n_items, keys % self.n_items, totals
+
+    def _gather(self, rows, weights):
+        """Return the neighbours of the given rows, their weighted scores and the row lengths."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        entries = offsets + np.arange(lengths.sum())
+
+        weighted = self.scores[entries] * np.repeat(np.asarray(weights, dtype=np.float64), lengths)
+        return self.indices[entries].astype(np.int64), weighted, lengths
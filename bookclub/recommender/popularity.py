@@ -0,0 +1,121 @@
+import bisect
+import threading
+import time
+
+from bookclub.models import Book, Genre
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+class PopularityRanking:
+    """In-memory ranking of the most popular books for cold-start pages.
+
+    Holds the ids of the top size books by (-average_rating, -readers_count)
+    so popular books can be listed without sorting the whole catalog. Book
+    saves and deletes in this process update the ranking in place; changes
+    made elsewhere, such as by other workers, are picked up when the ranking
+    is reloaded after ttl seconds.
+
+    The kept ids are always an exact prefix of the full ranking: a book
+    that drops below the last kept book is removed rather than kept out of
+    order, and lookups that run past the kept prefix fall back to the
+    database."""
+
+    def __init__(self, size=2000, ttl=60):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._keys = []
+        self._books = {}
+        self._truncated = False
+        self._filtered = {}
+
+    @staticmethod
+    def rank_key(book_id, average_rating, readers_count):
+        return (-average_rating, -readers_count, book_id)
+
+    def reload(self):
+        """Read the top of the ranking from the database with one query."""
+        rows = list(Book.objects.order_by('-average_rating', '-readers_count', 'id').values_list(
+            'id', 'average_rating', 'readers_count', 'genre')[:self.size + 1])
+        with self._lock:
+            self._truncated = len(rows) > self.size
+            self._keys = [self.rank_key(book_id, rating, readers) for book_id, rating, readers, _ in rows[:self.size]]
+            self._books = {book_id: (key, frozenset(Genre.names_from(genre)))
+                           for key, (book_id, _, _, genre) in zip(self._keys, rows)}
+            self._filtered = {}
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+            self.reload()
+
+    def book_changed(self, sender, instance, **kwargs):
+        """post_save receiver: move the book to its new place in the ranking."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._remove(instance.id)
+            key = self.rank_key(instance.id, instance.average_rating, instance.readers_count)
+            if self._truncated and self._keys and key > self._keys[-1]:
+                return
+
+            bisect.insort(self._keys, key)
+            self._books[instance.id] = (key, frozenset(Genre.names_from(instance.genre)))
+            if len(self._keys) > self.size:
+                dropped = self._keys.pop()
+                del self._books[dropped[2]]
+                self._truncated = True
+
+    def book_deleted(self, sender, instance, **kwargs):
+        """post_delete receiver: drop the book from the ranking."""
+        with self._lock:
+            self._remove(instance.id)
+
+    def _remove(self, book_id):
+        entry = self._books.pop(book_id, None)
+        if entry is not None:
+            del self._keys[bisect.bisect_left(self._keys, entry[0])]
+        self._filtered = {}
+
+    def get_book_ids(self, num_of_rec, exclude=(), genres=()):
+        """Return the ids of the num_of_rec most popular books.
+
+        Books whose id is in exclude are skipped, and with genres only books
+        listed under every one of them are."""
+        if num_of_rec <= 0:
+            return []
+
+        self._ensure_loaded()
+        exclude = set(exclude)
+        genres = tuple(sorted(genres))
+
+        with self._lock:
+            ranked = self._filtered.get(genres)
+            if ranked is None:
+                ranked = [key[2] for key in self._keys if all(genre in self._books[key[2]][1] for genre in genres)]
+                self._filtered[genres] = ranked
+            truncated = self._truncated
+
+        book_ids = []
+        for book_id in ranked:
+            if book_id not in exclude:
+                book_ids.append(book_id)
+                if len(book_ids) == num_of_rec:
+                    return book_ids
+
+        if not truncated:
+            return book_ids
+        return self._query_book_ids(num_of_rec, exclude, genres)
+
+    def _query_book_ids(self, num_of_rec, exclude, genres):
+        books = Book.objects.exclude(id__in=exclude)
+        for genre in genres:
+            books = books.filter(genres__name=genre)
+        return list(books.order_by('-average_rating', '-readers_count', 'id').values_list('id', flat=True)[:num_of_rec])
+
+
+popular_books = PopularityRanking(settings.RECOMMENDER_POPULAR_SIZE, settings.RECOMMENDER_POPULAR_TTL)
+post_save.connect(popular_books.book_changed, sender=Book)
+post_delete.connect(popular_books.book_deleted, sender=Book)
@@ -0,0 +1,53 @@
+import numpy as np
+from bookclub.models import User
+
+
+class ReadSet:
+    """The ids of the books a user has read, as a sorted int64 array."""
+
+    def __init__(self, book_ids):
+        self.book_ids = np.unique(np.asarray(book_ids, dtype=np.int64))
+
+    def __len__(self):
+        return self.book_ids.size
+
+    def __contains__(self, book_id):
+        position = np.searchsorted(self.book_ids, book_id)
+        return position < self.book_ids.size and self.book_ids[position] == book_id
+
+    def contains(self, book_ids):
+        """Return a boolean mask telling which of the given book ids were read."""
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        if self.book_ids.size == 0:
+            return np.zeros(book_ids.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self.book_ids, book_ids), self.book_ids.size - 1)
+        return self.book_ids[positions] == book_ids
+
+
+class ReadSetProvider:
+    """Loads and caches users' read sets for the lifetime of one request.
+
+    Every recommender of a request shares one provider, so each user's
+    all_books ids are fetched at most once and filtering read books costs
+    no further queries."""
+
+    def __init__(self):
+        self._read_sets = {}
+
+    def get(self, user_id):
+        return self.get_many([user_id])[user_id]
+
+    def get_many(self, user_ids):
+        """Return {user id: ReadSet}, loading all missing users with one query."""
+        missing = [user_id for user_id in user_ids if user_id not in self._read_sets]
+        if missing:
+            book_ids = {user_id: [] for user_id in missing}
+            rows = User.all_books.through.objects.filter(user_id__in=missing).values_list('user_id', 'book_id')
+            for user_id, book_id in rows:
+                book_ids[user_id].append(book_id)
+            for user_id, ids in book_ids.items():
+                self._read_sets[user_id] = ReadSet(ids)
+        return {user_id: self._read_sets[user_id] for user_id in user_ids}
+
+    def invalidate(self, user_id):
+        self._read_sets.pop(user_id, None)
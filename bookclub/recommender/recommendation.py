@@ -1,20 +1,31 @@
-import random
-from collections import Counter
-from functools import reduce
-
 from bookclub.models import Book, Club, Rating, User
+from django.conf import settings
 
 from .GenreSimilarityModel import GenreSimilarityModel
+from .hydration import hydrate_books
+from .ImplicitALSModel import ImplicitALSModel
+from .metrics import pipeline_metrics
+from .popularity import popular_books
+from .read_sets import ReadSet, ReadSetProvider
 from .SVDModel import SVDModel
 
 
 class Recommendation:
     def __init__(self, isItemBased, recHelper):
+        self.read_sets = ReadSetProvider()
+        self.implicit = None
         if isItemBased:
-            self.item_based = SVDModel(recHelper)
-        self.content_based = GenreSimilarityModel()
+            self.item_based = SVDModel(recHelper, self.read_sets)
+            if settings.RECOMMENDER_READING_LIST_ENGINE == 'als':
+                self.implicit = ImplicitALSModel(recHelper, self.read_sets)
+        self.content_based = GenreSimilarityModel(self.read_sets)
 
     def get_recommendations(self, request, num_of_rec, user_id=None, book_id=None, club_id=None):
+        with pipeline_metrics.stage('recommendation'):
+            recommendations = self.get_recommendation_ids(request, num_of_rec, user_id, book_id, club_id)
+            return self.get_books(recommendations)
+
+    def get_recommendation_ids(self, request, num_of_rec, user_id=None, book_id=None, club_id=None):
         recommendations = []
         if book_id:
             recommendations = list(self.content_based.get_recommendations_for_book(user_id, book_id).keys())[:num_of_rec]
@@ -28,39 +39,64 @@ class Recommendation:
             except:
                 user = request.user
 
-            if Rating.objects.filter(user_id=user.id):
+            # Until the worker publishes the first model, rated users get the fallbacks too
+            if self.item_based.model is not None and Rating.objects.filter(user_id=user.id):
                 recommendations = self.item_based.get_recommendations(user.id, num_of_rec)
-                
+
+            elif self.implicit is not None and (implicit := self.implicit.get_recommendations(user.id, num_of_rec)):
+                recommendations = implicit
+
             elif user.books.count() >= 1:
                 recommendations = self.content_based.get_genre_recommendations(user.id)[:num_of_rec]
 
             else:
-                books = Book.objects.all()
-                return books.order_by('-average_rating','-readers_count')[:num_of_rec]    
+                recommendations = popular_books.get_book_ids(num_of_rec)
             
-        return self.get_books(recommendations)
+        return recommendations
+
+    def get_recommendations_batch(self, user_ids, num_of_rec):
+        """Return {user id: ranked book ids} for many users.
+
+        Users with ratings are scored together in one pass, as are the
+        others' reading list recommendations. The rest fall back to the
+        same genre and popularity recommendations as get_recommendation_ids,
+        with the popular books read only once. Until the first model is
+        trained, users with ratings take the same fallbacks."""
+        rated = set()
+        if self.item_based.model is not None:
+            rated = set(Rating.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        with pipeline_metrics.stage('batch'):
+            recommendations = self.item_based.get_recommendations_batch(
+                [user_id for user_id in user_ids if user_id in rated], num_of_rec
+            )
+
+        cold = [user_id for user_id in user_ids if user_id not in rated]
+        implicit = self.implicit.get_recommendations_batch(cold, num_of_rec) if self.implicit is not None else {}
+        readers = set(Book.readers.through.objects.filter(user_id__in=cold).values_list('user_id', flat=True))
+        popular = None
+        for user_id in cold:
+            if implicit.get(user_id):
+                recommendations[user_id] = implicit[user_id]
+            elif user_id in readers:
+                recommendations[user_id] = self.content_based.get_genre_recommendations(user_id)[:num_of_rec]
+            else:
+                if popular is None:
+                    popular = popular_books.get_book_ids(num_of_rec)
+                recommendations[user_id] = list(popular)
+        return recommendations
 
     def get_recommendations_for_club(self, request, num_of_rec, club_id):
         club = Club.objects.get(id=club_id)
-        members = club.members.all()
-        books = club.books.all()
-
-        recommendations =  []
-        for mem in members:
-            recommendations.append(list(self.get_recommendations(request, num_of_rec, mem.id)))
+        members = list(club.members.values_list('id', flat=True))
+        books = ReadSet(list(club.books.values_list('id', flat=True)))
 
-        all_recommendations = reduce(lambda z, y :z + y, recommendations)
-        filtered_rec = [book for book in all_recommendations if book not in books]
-        random.shuffle(filtered_rec)
-        counter = Counter(filtered_rec)
-        counter_list = counter.most_common(num_of_rec)
-        final_recommendations = [ seq[0].id for seq in counter_list ]
-        return final_recommendations
+        with pipeline_metrics.stage('club_scoring'):
+            recommendations = self.item_based.get_club_recommendations(members, books, num_of_rec)
+        if not recommendations:
+            recommendations = popular_books.get_book_ids(num_of_rec, exclude=books.book_ids.tolist())
+        return recommendations
 
     def get_books(self, recommendations):
-        books = []
-        for rec_id in recommendations:
-            books.append(Book.objects.get(id=rec_id))
-        
-        return books
+        with pipeline_metrics.stage('hydration'):
+            return hydrate_books(list(recommendations))
 
@@ -0,0 +1,146 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from bookclub.models import Rating, TrainingState, UserRecommendation
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import shared
+from .artifacts import ModelArtifact
+from .training import train_model
+from .worker import train_out_of_process
+
+logger = logging.getLogger(__name__)
+
+
+class RetrainScheduler:
+    """Single owner of recommender retraining.
+
+    A job only starts after atomically claiming the shared TrainingState row,
+    so at most one training runs at a time across all worker processes.
+    Retraining is triggered by the number of ratings created or edited since
+    the last training, or by elapsed time once anything has changed.
+    Background jobs train in a separate process; the web process only loads
+    the finished artifact, publishes it to shared memory for the other
+    workers and swaps it in."""
+
+    def __init__(self, recHelper, background=True):
+        self.rec_helper = recHelper
+        self.background = background
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self._last_check = None
+
+    def record_change(self):
+        """Make the next request re-check staleness straight away."""
+        self._last_check = None
+
+    def maybe_retrain(self):
+        """Start a retraining job if the model is stale and none is running."""
+        now = time.monotonic()
+        if self._last_check is not None and now - self._last_check < settings.RECOMMENDER_STALENESS_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+
+        state = TrainingState.get_state()
+        self.reload_if_newer(state)
+        if not self.is_stale(state):
+            return False
+
+        if not self.claim():
+            TrainingState.objects.filter(pk=state.pk).update(pending=F('pending') + 1)
+            return False
+
+        if self.background:
+            self._executor.submit(self._run_in_background, settings.RECOMMENDER_TRAIN_OUT_OF_PROCESS)
+        else:
+            self.run()
+        return True
+
+    def train_now(self, keep=3):
+        """Train synchronously unless another job is already in flight."""
+        TrainingState.get_state()
+        if not self.claim():
+            return False
+        self.run(keep)
+        return True
+
+    def changed_ratings(self, state):
+        ratings = Rating.objects.all()
+        if state.last_trained_at:
+            ratings = ratings.filter(updated_at__gt=state.last_trained_at)
+        return ratings.count()
+
+    def is_stale(self, state):
+        changed = self.changed_ratings(state)
+        if changed == 0:
+            return False
+        if state.last_trained_at is None or changed >= settings.RECOMMENDER_RETRAIN_AFTER_RATINGS:
+            return True
+        elapsed = timezone.now() - state.last_trained_at
+        return elapsed >= timedelta(seconds=settings.RECOMMENDER_RETRAIN_INTERVAL)
+
+    def claim(self):
+        """Atomically mark training as running; return whether we own it.
+
+        A job that has been running for longer than the training timeout is
+        assumed to have died with its worker and can be taken over."""
+        now = timezone.now()
+        expired = now - timedelta(seconds=settings.RECOMMENDER_TRAINING_TIMEOUT)
+        claimed = TrainingState.objects.filter(pk=1).filter(
+            Q(status=TrainingState.Status.IDLE) | Q(started_at__lt=expired)
+        ).update(status=TrainingState.Status.RUNNING, started_at=now, pending=0)
+        return claimed == 1
+
+    def run(self, keep=3, out_of_process=False):
+        """Train, publish the new artifact and release the claim."""
+        state = TrainingState.get_state()
+        start = time.time()
+        try:
+            if out_of_process:
+                model = ModelArtifact.load(train_out_of_process(settings.RECOMMENDER_ARTIFACT_DIR, keep))
+            else:
+                model = train_model()
+                model.save(settings.RECOMMENDER_ARTIFACT_DIR, keep=keep)
+            if settings.RECOMMENDER_SHARED_MEMORY:
+                model = shared.publish(model, settings.RECOMMENDER_ARTIFACT_DIR)
+            self.rec_helper.set_model(model)
+        except Exception:
+            TrainingState.objects.filter(pk=state.pk).update(status=TrainingState.Status.IDLE)
+            raise
+
+        TrainingState.objects.filter(pk=state.pk).update(
+            status=TrainingState.Status.IDLE,
+            last_trained_at=state.started_at,
+            last_duration=time.time() - start,
+            model_version=model.version
+        )
+        UserRecommendation.mark_all_stale()
+        return model
+
+    def _run_in_background(self, out_of_process=True):
+        try:
+            self.run(out_of_process=out_of_process)
+        except Exception:
+            logger.exception('Recommender retraining failed.')
+        finally:
+            connections.close_all()
+
+    def reload_if_newer(self, state):
+        """Switch to the artifact published by another worker, if it is newer."""
+        model = self.rec_helper.model
+        if state.model_version and (model is None or model.version < state.model_version):
+            self.rec_helper.load_latest(settings.RECOMMENDER_ARTIFACT_DIR, settings.RECOMMENDER_SHARED_MEMORY)
+
+    def status(self):
+        state = TrainingState.get_state()
+        return {
+            'running': state.status == TrainingState.Status.RUNNING,
+            'last_trained_at': state.last_trained_at,
+            'last_duration': state.last_duration,
+            'queue_depth': state.pending,
+            'model_version': state.model_version,
+        }
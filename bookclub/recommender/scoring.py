@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def top_n(scores, n, exclude=None):
+    """Return the indices of the n highest scores, best first.
+
+    Indices flagged in the boolean exclude mask are never returned. Equal
+    scores are ordered by ascending index, the same order a stable
+    descending sort of the whole vector would give."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if exclude is None:
+        candidates = np.arange(scores.size)
+    else:
+        candidates = np.flatnonzero(~exclude[:scores.size])
+
+    if n <= 0 or candidates.size == 0:
+        return np.empty(0, dtype=np.intp)
+
+    values = scores[candidates]
+    if n < candidates.size:
+        threshold = values[np.argpartition(-values, n - 1)[n - 1]]
+        selected = values >= threshold
+        candidates = candidates[selected]
+        values = values[selected]
+
+    order = np.lexsort((candidates, -values))
+    return candidates[order[:n]]
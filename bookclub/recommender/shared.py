@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .artifacts import ModelArtifact
+
+MANIFEST = 'shared_manifest.json'
+ALIGNMENT = 64
+
+
+def publish(model, root):
+    """Copy a model into one shared memory segment and announce it in the manifest.
+
+    Returns the model attached to the new segment. The segment of the
+    previously published version is unlinked; workers still attached to it
+    keep their mapping until they switch to the new version."""
+    layout = {}
+    size = 0
+    for name in ModelArtifact.ARRAYS:
+        array = np.ascontiguousarray(getattr(model, name))
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': size}
+        size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    segment = _open(f'bookclub-model-{model.version}', create=True, size=max(size, 1))
+    for name, entry in layout.items():
+        array = np.ndarray(entry['shape'], dtype=entry['dtype'], buffer=segment.buf, offset=entry['offset'])
+        array[...] = getattr(model, name)
+
+    previous = read_manifest(root)
+    os.makedirs(root, exist_ok=True)
+    tmp_path = os.path.join(root, f'.{MANIFEST}')
+    with open(tmp_path, 'w') as manifest_file:
+        json.dump({
+            'version': model.version,
+            'segment': segment.name,
+            'global_mean': model.global_mean,
+            'trained_at': model.trained_at.isoformat(),
+            'arrays': layout,
+        }, manifest_file)
+    os.replace(tmp_path, os.path.join(root, MANIFEST))
+
+    if previous is not None and previous['segment'] != segment.name:
+        _unlink(previous['segment'])
+    return _attach(segment, read_manifest(root))
+
+
+def attach(root):
+    """Attach read-only to the published model, or return None if there is none."""
+    manifest = read_manifest(root)
+    if manifest is None:
+        return None
+    try:
+        segment = _open(manifest['segment'])
+    except FileNotFoundError:
+        return None
+    return _attach(segment, manifest)
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def unpublish(root):
+    """Unlink the published segment and remove the manifest."""
+    manifest = read_manifest(root)
+    if manifest is not None:
+        _unlink(manifest['segment'])
+        os.remove(os.path.join(root, MANIFEST))
+
+
+def _attach(segment, manifest):
+    arrays = {}
+    for name in ModelArtifact.ARRAYS:
+        entry = manifest['arrays'][name]
+        array = np.ndarray(entry['shape'], dtype=entry['dtype'], buffer=segment.buf, offset=entry['offset'])
+        array.flags.writeable = False
+        arrays[name] = array
+
+    model = ModelArtifact(manifest['version'], arrays, manifest['global_mean'],
+                          datetime.fromisoformat(manifest['trained_at']))
+    model.segment = segment
+    return model
+
+
+def _open(name, create=False, size=0):
+    """Open a segment without handing it to this process's resource tracker.
+
+    Before Python 3.13 every SharedMemory, even one only attached to, is
+    registered with the resource tracker, which unlinks it when the process
+    exits and so pulls the model from under the other workers (CPython
+    issue gh-82300, formerly bpo-38119). Python 3.13 added track=False;
+    older versions undo the registration, made under the segment's name
+    with a leading slash on POSIX, the only platform that registers."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    if os.name == 'posix':
+        resource_tracker.unregister(f'/{segment.name}', 'shared_memory')
+    return segment
+
+
+def _unlink(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.unlink()
+    segment.close()
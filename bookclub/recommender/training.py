@@ -0,0 +1,106 @@
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+from bookclub.models import Rating
+from django.conf import settings
+from django.utils import timezone
+from surprise import SVD, Trainset
+
+from .als import fit_als, interaction_matrix, load_interactions
+from .artifacts import ModelArtifact
+from .metrics import pipeline_metrics
+
+
+def load_ratings(since=None, chunk_size=5000):
+    """Stream ratings into (user_ids, book_ids, ratings) NumPy arrays.
+
+    All rows come from a single values_list query read chunk by chunk into
+    arrays that grow geometrically, so no model instances or per-row Python
+    lists are built. Pass since to only load ratings created or edited after
+    that time."""
+    ratings = Rating.objects.order_by('id')
+    if since is not None:
+        ratings = ratings.filter(updated_at__gt=since)
+    rows = ratings.values_list('user_id', 'book_id', 'rating').iterator(chunk_size=chunk_size)
+
+    user_ids = np.empty(chunk_size, dtype=np.int64)
+    book_ids = np.empty(chunk_size, dtype=np.int64)
+    values = np.empty(chunk_size, dtype=np.float64)
+    size = 0
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        end = size + len(chunk)
+        if end > user_ids.size:
+            capacity = max(end, 2 * user_ids.size)
+            user_ids = _grow(user_ids, capacity)
+            book_ids = _grow(book_ids, capacity)
+            values = _grow(values, capacity)
+
+        block = np.array(chunk, dtype=np.float64)
+        user_ids[size:end] = block[:, 0]
+        book_ids[size:end] = block[:, 1]
+        values[size:end] = block[:, 2]
+        size = end
+
+    return user_ids[:size], book_ids[:size], values[:size]
+
+def _grow(array, capacity):
+    grown = np.empty(capacity, dtype=array.dtype)
+    grown[:array.size] = array
+    return grown
+
+def _inner_ids(raw_ids):
+    """Map raw ids to inner ids in order of first appearance, like surprise does."""
+    unique, first_seen, inverse = np.unique(raw_ids, return_index=True, return_inverse=True)
+    order = np.argsort(first_seen, kind='stable')
+    rank = np.empty(order.size, dtype=np.int64)
+    rank[order] = np.arange(order.size)
+    return unique[order], rank[inverse.ravel()]
+
+def build_trainset(user_ids, book_ids, ratings, rating_scale=(0, 10)):
+    """Build a surprise trainset straight from rating arrays."""
+    raw_uids, inner_uids = _inner_ids(user_ids)
+    raw_iids, inner_iids = _inner_ids(book_ids)
+
+    ur = defaultdict(list)
+    ir = defaultdict(list)
+    for uid, iid, rating in zip(inner_uids.tolist(), inner_iids.tolist(), ratings.tolist()):
+        ur[uid].append((iid, rating))
+        ir[iid].append((uid, rating))
+
+    return Trainset(
+        ur,
+        ir,
+        raw_uids.size,
+        raw_iids.size,
+        len(ratings),
+        rating_scale,
+        {raw: inner for inner, raw in enumerate(raw_uids.tolist())},
+        {raw: inner for inner, raw in enumerate(raw_iids.tolist())},
+    )
+
+def train_model():
+    trained_at = timezone.now()
+    with pipeline_metrics.stage('load_ratings'):
+        trainset = build_trainset(*load_ratings())
+    with pipeline_metrics.stage('svd_fit'):
+        algo = SVD().fit(trainset)
+    with pipeline_metrics.stage('load_interactions'):
+        _, als_raw_iids, interactions = interaction_matrix(*load_interactions())
+    with pipeline_metrics.stage('als_fit'):
+        _, als_item_factors = fit_als(
+            interactions,
+            settings.RECOMMENDER_ALS_FACTORS,
+            settings.RECOMMENDER_ALS_REGULARIZATION,
+            settings.RECOMMENDER_ALS_ALPHA,
+            settings.RECOMMENDER_ALS_ITERATIONS,
+            settings.RECOMMENDER_ALS_CG_STEPS
+        )
+    with pipeline_metrics.stage('similarity'):
+        return ModelArtifact.from_trainset(trainset, algo, trained_at, settings.RECOMMENDER_NEIGHBORS,
+                                          settings.RECOMMENDER_ANN_LISTS, (als_raw_iids, als_item_factors))
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+# Training runs in a freshly spawned interpreter rather than a fork of the
+# web worker, which may hold threads, locks and open database connections
+CONTEXT = multiprocessing.get_context('spawn')
+
+
+def setup_worker(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+
+
+def train_artifact(artifact_dir, keep=3):
+    """Train a model and save it as an artifact; return the artifact path.
+
+    Runs inside the training process, so Django models are only imported
+    here, after setup_worker has configured Django."""
+    from .metrics import pipeline_metrics
+    from .training import train_model
+
+    path = train_model().save(artifact_dir, keep=keep)
+    pipeline_metrics.flush()
+    return path
+
+
+def train_out_of_process(artifact_dir, keep=3):
+    """Train in a separate process and return the path of the saved artifact.
+
+    The process only lives for one training, so its memory peak never
+    stays with the caller."""
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=CONTEXT,
+        initializer=setup_worker,
+        initargs=(os.environ['DJANGO_SETTINGS_MODULE'],)
+    ) as pool:
+        return pool.submit(train_artifact, artifact_dir, keep).result()
@@ -1,22 +1,86 @@
+import threading
+from contextlib import contextmanager
+
+from bookclub.recommender import shared
+from bookclub.recommender.artifacts import ModelArtifact, latest_artifact_path
+
 
 class RecommenderHelper:
+    """Holds the current model snapshot.
+
+    A new model is published by swapping a single reference. A request pins
+    the snapshot it started with, so every read in that request sees the same
+    model even if a retrain is published meanwhile; a replaced snapshot is
+    released once its last reader unpins it. A request that started before
+    any model existed pins the first one it reads, including one it
+    published itself."""
     
     def __init__(self):
-        self.trainset = None
-        self.similarity_matrix = None
-        self.counter = 0  
+        self._model = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
 
-    def set_trainset(self, trainset):
-        self.trainset = trainset 
+    @property
+    def model(self):
+        """The snapshot pinned by the current thread, or else the latest one."""
+        if not getattr(self._local, 'pinned', False):
+            return self._model
+        if self._local.model is None:
+            self._local.model = self._acquire()
+        return self._local.model
 
-    def set_similarity_matrix(self , similarity_matrix):
-        self.similarity_matrix = similarity_matrix
-    
-    def increment_counter(self):
-        self.counter += 1
+    def _acquire(self):
+        with self._lock:
+            model = self._model
+            if model is not None:
+                model.readers += 1
+        return model
+
+    def set_model(self, model):
+        with self._lock:
+            old_model, self._model = self._model, model
+            if old_model is not None and old_model is not model:
+                old_model.retired = True
+                if old_model.readers == 0:
+                    old_model.release()
+
+    @contextmanager
+    def pin(self):
+        """Pin the latest snapshot for the duration of the block; nested pins share it."""
+        if getattr(self._local, 'pinned', False):
+            yield self.model
+            return
+
+        self._local.model = self._acquire()
+        self._local.pinned = True
+        try:
+            yield self._local.model
+        finally:
+            model, self._local.model = self._local.model, None
+            self._local.pinned = False
+            if model is not None:
+                with self._lock:
+                    model.readers -= 1
+                    if model.retired and model.readers == 0:
+                        model.release()
 
-    def reset_counter(self):
-        self.counter = 0
+    def load_latest(self, artifact_dir, shared_memory=False):
+        """Attach to the newest model, if there is one.
 
+        With shared_memory, the model published in shared memory is used when
+        it is available; otherwise the newest saved artifact is memory-mapped."""
+        if shared_memory:
+            model = shared.attach(artifact_dir)
+            if model is not None:
+                self.set_model(model)
+                return True
 
+        path = latest_artifact_path(artifact_dir)
+        if path is None:
+            return False
 
+        try:
+            self.set_model(ModelArtifact.load(path))
+        except (OSError, ValueError, KeyError):
+            return False
+        return True
@@ -0,0 +1,29 @@
+from django.db import connection
+
+# The trigram tokenizer cannot match queries shorter than a trigram
+MIN_QUERY_LENGTH = 3
+
+
+def fts_phrase(searched):
+    """Quote searched as one FTS5 phrase, so its operators and punctuation are matched literally."""
+    return '"' + searched.replace('"', '""') + '"'
+
+
+def search(model, field, searched):
+    """Return the model's rows whose field contains searched, best BM25 match first.
+
+    On SQLite the lookup goes through the model's FTS5 table (see
+    BookSearch), which finds the rows through its trigram index instead of
+    scanning the table, so it stays fast on large catalogs. Queries too
+    short for a trigram and other databases fall back to a LIKE filter in
+    the model's own ordering. Either way the result is a queryset, so it
+    can be re-sorted and paginated."""
+    if connection.vendor != 'sqlite' or not searched or len(searched) < MIN_QUERY_LENGTH:
+        return model.objects.filter(**{f'{field}__contains': searched})
+    return model.objects.filter(**{f'search_entry__{field}__match': fts_phrase(searched)}).order_by(
+        'search_entry__rank', 'id')
+
+
+def search_ids(model, field, searched, limit=None):
+    """Return the ids of the rows search() finds, best match first."""
+    return list(search(model, field, searched).values_list('id', flat=True)[:limit])
@@ -0,0 +1,77 @@
+"""Unit tests for the Genre model."""
+from bookclub.models import Book, Genre
+from django.test import TestCase
+
+
+class GenreModelTestCase(TestCase):
+    """Unit tests for the Genre model."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+        'bookclub/tests/fixtures/other_users.json',
+        'bookclub/tests/fixtures/default_book.json',
+        'bookclub/tests/fixtures/other_books.json'
+    ]
+
+    def setUp(self):
+        self.book = Book.objects.get(id=1)
+
+    def _genre_names(self, book):
+        return sorted(book.genres.values_list('name', flat=True))
+
+    def test_fixture_books_are_linked(self):
+        self.assertEqual(self._genre_names(self.book), ['Classics', 'Czech Literature', 'European Literature'])
+        self.assertEqual(Genre.objects.count(), 3)
+
+    def test_names_from_skips_blanks_and_repeats(self):
+        self.assertEqual(Genre.names_from('fiction,,fantasy,fiction'), ['fiction', 'fantasy'])
+        self.assertEqual(Genre.names_from(''), [])
+
+    def test_changing_genre_relinks_book(self):
+        self.book.genre = 'Classics,Poetry'
+        self.book.save()
+        self.assertEqual(self._genre_names(Book.objects.get(id=1)), ['Classics', 'Poetry'])
+
+    def test_saving_unchanged_genre_does_not_relink(self):
+        book = Book.objects.get(id=1)
+        book.readers_count = 5
+        with self.assertNumQueries(1):
+            book.save()
+
+    def test_new_book_is_linked(self):
+        book = Book.objects.create(ISBN='380000059', title='title', author='author', genre='Poetry')
+        self.assertEqual(self._genre_names(book), ['Poetry'])
+
+    def test_link_many_books(self):
+        Book.genres.through.objects.all().delete()
+        Genre.link(Book.objects.all())
+        for book in Book.objects.all():
+            self.assertEqual(self._genre_names(book), sorted(Genre.names_from(book.genre)))
+
+    def _book_counts(self):
+        return dict(Genre.objects.values_list('name', 'book_count'))
+
+    def test_book_counts_follow_links(self):
+        counts = self._book_counts()
+        for genre in Genre.objects.all():
+            self.assertEqual(counts[genre.name], genre.books.count())
+
+    def test_changing_genre_moves_book_counts(self):
+        self.book.genre = 'Classics,Poetry'
+        self.book.save()
+        counts = self._book_counts()
+        self.assertEqual(counts['Classics'], 3)
+        self.assertEqual(counts['Czech Literature'], 2)
+        self.assertEqual(counts['Poetry'], 1)
+
+    def test_deleting_book_lowers_book_counts(self):
+        self.book.delete()
+        self.assertEqual(self._book_counts()['Classics'], 2)
+        Book.objects.all().delete()
+        self.assertEqual(set(self._book_counts().values()), {0})
+        self.assertEqual(list(Genre.top(40)), [])
+
+    def test_top_genres(self):
+        Book.objects.create(ISBN='380000059', title='title', author='author', genre='Poetry,Classics')
+        self.assertEqual([genre.name for genre in Genre.top(2)], ['Classics', 'Czech Literature'])
+        with self.assertNumQueries(1):
+            list(Genre.top(40))
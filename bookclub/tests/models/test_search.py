@@ -0,0 +1,68 @@
+"""Unit tests for full-text search."""
+from bookclub.models import Book, Club, User
+from bookclub.search import search, search_ids
+from django.test import TestCase
+
+
+class SearchTestCase(TestCase):
+    """Unit tests for full-text search."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+        'bookclub/tests/fixtures/other_users.json',
+        'bookclub/tests/fixtures/default_book.json',
+        'bookclub/tests/fixtures/other_books.json',
+        'bookclub/tests/fixtures/default_club.json'
+    ]
+
+    def _create_book(self, isbn, title, author='Someone', genre='Poetry'):
+        return Book.objects.create(ISBN=isbn, title=title, author=author, genre=genre)
+
+    def test_search_matches_substrings_ignoring_case(self):
+        self.assertEqual(search_ids(Book, 'title', 'LASSIC'), [1])
+        self.assertEqual(search_ids(Book, 'author', 'bruce'), [2])
+        self.assertEqual(search_ids(User, 'username', 'doe'), [1, 2])
+
+    def test_closer_matches_rank_first(self):
+        echo = self._create_book('380000059', 'Echo Echo Echo')
+        self._create_book('0330294822', 'The Echo and the Long Lost Valley')
+        self.assertEqual(search_ids(Book, 'title', 'echo')[0], echo.id)
+
+    def test_search_is_restricted_to_the_field(self):
+        self._create_book('380000059', 'Poems', author='Someone', genre='Richard Bruce')
+        self.assertEqual(search_ids(Book, 'author', 'Richard'), [2])
+
+    def test_inserted_rows_are_indexed(self):
+        book = self._create_book('380000059', 'Fresh Arrival')
+        self.assertEqual(search_ids(Book, 'title', 'arriv'), [book.id])
+
+    def test_updated_rows_are_reindexed(self):
+        book = Book.objects.get(id=3)
+        book.title = 'Renamed'
+        book.save()
+        self.assertEqual(search_ids(Book, 'title', 'Test'), [])
+        self.assertEqual(search_ids(Book, 'title', 'Renamed'), [3])
+        Book.objects.filter(id=3).update(genre='Poetry')
+        self.assertEqual(search_ids(Book, 'genre', 'oetr'), [3])
+
+    def test_deleted_rows_leave_the_index(self):
+        Book.objects.get(id=2).delete()
+        User.objects.filter(id=2).delete()
+        self.assertEqual(search_ids(Book, 'author', 'Wright'), [])
+        self.assertEqual(search_ids(User, 'username', 'doe'), [1])
+
+    def test_query_syntax_is_matched_literally(self):
+        book = self._create_book('380000059', 'Say "hi" - AND NOT *')
+        self.assertEqual(search_ids(Book, 'title', '"hi" - AND'), [book.id])
+        self.assertEqual(search_ids(Book, 'title', 'NOT *'), [book.id])
+
+    def test_short_queries_fall_back_to_like(self):
+        club = Club.objects.get(id=1)
+        club.country = 'UK'
+        club.save()
+        self.assertEqual(search_ids(Club, 'country', 'uk'), [1])
+        self.assertEqual(search(Book, 'title', '').count(), 3)
+
+    def test_search_returns_a_queryset_that_can_be_sorted(self):
+        results = search(User, 'country', 'states').order_by('-username')
+        self.assertEqual(list(results.values_list('username', flat=True))[:2], ['willsmith', 'peterpickles'])
+        self.assertEqual(results.count(), 6)
@@ -0,0 +1,125 @@
+"""Unit tests for the implicit-feedback ALS recommender."""
+import numpy as np
+from bookclub.models import Book, Club, User
+from bookclub.recommender.als import (conjugate_gradient, fit_als, interaction_matrix, load_interactions,
+                                      solve_user)
+from bookclub.recommender.ImplicitALSModel import ImplicitALSModel
+from bookclub.recommender.recommendation import Recommendation
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+from scipy.sparse import csr_matrix
+
+
+class ALSTestCase(TestCase):
+    """Unit tests for the implicit-feedback ALS math."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.interactions = csr_matrix(rng.integers(0, 2, size=(12, 9)) * rng.random((12, 9)))
+        self.fixed = rng.normal(size=(9, 4))
+
+    def _exact(self, confidence, reg):
+        rows = []
+        for row in confidence.toarray():
+            weights = 1 + row
+            preferences = (row > 0).astype(float)
+            normal = (self.fixed.T * weights) @ self.fixed + reg * np.eye(4)
+            rows.append(np.linalg.solve(normal, self.fixed.T @ (weights * preferences)))
+        return np.array(rows)
+
+    def test_conjugate_gradient_converges_to_exact_solution(self):
+        confidence = self.interactions * 5
+        start = np.zeros((12, 4))
+        factors = conjugate_gradient(confidence, self.fixed, start, 0.1, steps=4)
+        np.testing.assert_allclose(factors, self._exact(confidence, 0.1), atol=1e-6)
+        self.assertFalse(start.any())
+
+    def test_solve_user_matches_exact_solution(self):
+        confidence = self.interactions * 5
+        row = confidence.getrow(0)
+        factors = solve_user(self.fixed, self.fixed.T @ self.fixed, row.indices, row.data, 0.1)
+        np.testing.assert_allclose(factors, self._exact(confidence, 0.1)[0])
+
+    def test_fit_als_lowers_the_loss(self):
+        def loss(users, items):
+            confidence = 1 + 10 * self.interactions.toarray()
+            preferences = (self.interactions.toarray() > 0).astype(float)
+            return (confidence * (preferences - users @ items.T) ** 2).sum()
+
+        first = loss(*fit_als(self.interactions, n_factors=4, alpha=10, n_iter=1))
+        last = loss(*fit_als(self.interactions, n_factors=4, alpha=10, n_iter=10))
+        self.assertLess(last, first)
+
+    def test_fit_als_shapes(self):
+        users, items = fit_als(self.interactions, n_factors=3, n_iter=2)
+        self.assertEqual(users.shape, (12, 3))
+        self.assertEqual(items.shape, (9, 3))
+
+    def test_interaction_matrix_sums_signals(self):
+        raw_uids, raw_iids, matrix = interaction_matrix(
+            np.array([7, 3, 7]), np.array([20, 10, 20]), np.array([1.0, 0.5, 0.5])
+        )
+        self.assertEqual(raw_uids.tolist(), [3, 7])
+        self.assertEqual(raw_iids.tolist(), [10, 20])
+        self.assertEqual(matrix.toarray().tolist(), [[0.5, 0.0], [0.0, 1.5]])
+
+
+class ImplicitALSModelTestCase(TestCase):
+    """Unit tests for recommending from reading lists."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json',
+                'bookclub/tests/fixtures/default_club.json']
+
+    def setUp(self):
+        self.user = User.objects.get(id=4)
+        self.user.all_books.add(1)
+        User.objects.get(id=5).all_books.add(1, 2)
+        club = Club.objects.get(id=1)
+        club.members.add(3, 5)
+        Book.objects.get(id=2).clubs.add(club)
+        self.rec_helper = RecommenderHelper()
+        self.rec_helper.set_model(train_model())
+
+    def test_load_interactions_reads_every_signal(self):
+        user_ids, book_ids, weights = load_interactions()
+        signals = sorted(zip(user_ids.tolist(), book_ids.tolist(), weights.tolist()))
+        self.assertEqual(signals, [
+            (2, 2, 0.5), (3, 2, 0.5), (3, 3, 1.0), (4, 1, 1.0), (5, 1, 1.0), (5, 2, 0.5), (5, 2, 1.0)
+        ])
+
+    def test_load_interactions_for_some_users(self):
+        with self.assertNumQueries(3):
+            user_ids, book_ids, weights = load_interactions([4])
+        self.assertEqual(user_ids.tolist(), [4])
+        self.assertEqual(book_ids.tolist(), [1])
+
+    def test_model_has_item_factors_for_interacted_books(self):
+        model = self.rec_helper.model
+        self.assertEqual(model.als_raw_iids.tolist(), [1, 2, 3])
+        np.testing.assert_allclose(model.als_gram, model.als_item_factors.T @ model.als_item_factors)
+        self.assertEqual(model.to_als_iids([2, 99]).tolist(), [1, -1])
+
+    def test_recommendations_exclude_books_of_the_user(self):
+        recommendations = ImplicitALSModel(self.rec_helper).get_recommendations(self.user.id, 3)
+        self.assertEqual(sorted(recommendations), [2, 3])
+
+    def test_batch_matches_single_user_recommendations(self):
+        model = ImplicitALSModel(self.rec_helper)
+        batch = model.get_recommendations_batch([3, 4, 5, 6], 2)
+        self.assertEqual(sorted(batch), [3, 4, 5])
+        for user_id, recommendations in batch.items():
+            self.assertEqual(recommendations, model.get_recommendations(user_id, 2))
+
+    def test_user_without_signals_gets_nothing(self):
+        self.assertEqual(ImplicitALSModel(self.rec_helper).get_recommendations(6, 3), [])
+
+    def test_reading_list_users_are_served_by_als(self):
+        expected = ImplicitALSModel(self.rec_helper).get_recommendations(self.user.id, 2)
+        recommendations = Recommendation(True, self.rec_helper).get_recommendations(None, 2, user_id=self.user.id)
+        self.assertEqual([book.id for book in recommendations], expected)
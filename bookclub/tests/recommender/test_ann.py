@@ -0,0 +1,57 @@
+"""Unit tests for the approximate item factor index."""
+import numpy as np
+from bookclub.recommender.ann import FactorIndex, kmeans
+from django.test import TestCase
+
+
+class FactorIndexTestCase(TestCase):
+    """Unit tests for the approximate item factor index."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.factors = rng.normal(size=(400, 8))
+        self.biases = rng.normal(size=400)
+        self.index = FactorIndex.from_factors(self.factors, self.biases, n_lists=20)
+        self.query = rng.normal(size=8)
+
+    def _exact(self, n, exclude=()):
+        scores = self.factors @ self.query + self.biases
+        order = [item for item in sorted(range(400), key=lambda item: (-scores[item], item)) if item not in exclude]
+        return order[:n]
+
+    def test_lists_partition_items(self):
+        self.assertEqual(self.index.n_lists, 20)
+        self.assertEqual(sorted(self.index.items.tolist()), list(range(400)))
+
+    def test_probing_every_list_is_exact(self):
+        items = self.index.search(self.query, 10, nprobe=20)
+        self.assertEqual(items.tolist(), self._exact(10))
+
+    def test_probing_few_lists_reads_fewer_items(self):
+        candidates = self.index.probe(self.query, 10, nprobe=2)
+        self.assertLess(candidates.size, 400)
+        self.assertGreaterEqual(candidates.size, 10)
+
+    def test_recall_grows_with_nprobe(self):
+        exact = set(self._exact(20))
+        recalls = [len(exact & set(self.index.search(self.query, 20, nprobe).tolist())) for nprobe in (1, 5, 20)]
+        self.assertEqual(recalls, sorted(recalls))
+        self.assertEqual(recalls[-1], 20)
+
+    def test_excluded_items_are_never_returned(self):
+        exclude = np.array(self._exact(5), dtype=np.int64)
+        items = self.index.search(self.query, 10, nprobe=20, exclude=np.sort(exclude))
+        self.assertEqual(items.tolist(), self._exact(10, exclude=set(exclude.tolist())))
+
+    def test_enough_lists_are_probed_for_n_results(self):
+        items = self.index.search(self.query, 100, nprobe=1)
+        self.assertEqual(len(items), 100)
+
+    def test_kmeans_assigns_every_vector(self):
+        centroids, assignment = kmeans(self.factors, 5)
+        self.assertEqual(centroids.shape, (5, 8))
+        self.assertEqual(assignment.shape, (400,))
+
+    def test_empty_index(self):
+        index = FactorIndex.from_factors(np.zeros((0, 8)), np.zeros(0))
+        self.assertEqual(len(index.search(self.query, 5, nprobe=3)), 0)
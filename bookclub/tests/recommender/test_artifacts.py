@@ -0,0 +1,60 @@
+"""Unit tests for the persisted recommender model artifacts."""
+import os
+import tempfile
+
+import numpy as np
+from bookclub.recommender.artifacts import ModelArtifact, latest_artifact_path, list_versions
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+
+
+class ModelArtifactTestCase(TestCase):
+    """Unit tests for the persisted recommender model artifacts."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.model = train_model()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_id_mappings_round_trip(self):
+        for inner_iid in range(self.model.n_items):
+            raw_iid = self.model.to_raw_iid(inner_iid)
+            self.assertEqual(self.model.to_inner_iid(raw_iid), inner_iid)
+
+    def test_unknown_user_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.model.to_inner_uid(-1)
+
+    def test_save_and_load_memory_mapped(self):
+        path = self.model.save(self.root)
+        loaded = ModelArtifact.load(path)
+        self.assertEqual(loaded.version, self.model.version)
+        self.assertIsInstance(loaded.neighbor_scores, np.memmap)
+        for name in ModelArtifact.ARRAYS:
+            self.assertTrue(np.array_equal(getattr(loaded, name), getattr(self.model, name)))
+        self.assertEqual(loaded.user_ratings(0), self.model.user_ratings(0))
+
+    def test_save_keeps_newest_versions(self):
+        for _ in range(4):
+            train_model().save(self.root, keep=2)
+        versions = list_versions(self.root)
+        self.assertEqual(len(versions), 2)
+        self.assertEqual(latest_artifact_path(self.root), os.path.join(self.root, versions[-1]))
+
+    def test_helper_loads_latest_artifact(self):
+        rec_helper = RecommenderHelper()
+        self.assertFalse(rec_helper.load_latest(self.root))
+        self.model.save(self.root)
+        self.assertTrue(rec_helper.load_latest(self.root))
+        self.assertEqual(rec_helper.model.version, self.model.version)
@@ -0,0 +1,59 @@
+"""Unit tests for the packed genre bitsets."""
+import numpy as np
+from bookclub.recommender.bitsets import GenreBitsets, popcount
+from django.test import TestCase
+
+
+class GenreBitsetsTestCase(TestCase):
+    """Unit tests for the packed genre bitsets."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.genres = [(book_id * 10, rng.choice(150, size=rng.integers(0, 6), replace=False).tolist())
+                       for book_id in range(40)]
+        self.bitsets = GenreBitsets.from_genres(self.genres)
+
+    def _dense(self):
+        dense = np.zeros((len(self.genres), len(self.bitsets.genre_ids)))
+        for row, (_, names) in enumerate(self.genres):
+            for name in names:
+                dense[row, self.bitsets.genre_ids[name]] = 1
+        return dense
+
+    def test_popcount(self):
+        words = np.array([[0, 1], [2 ** 64 - 1, 6]], dtype=np.uint64)
+        self.assertEqual(popcount(words).tolist(), [1, 66])
+
+    def test_genres_span_several_words(self):
+        self.assertEqual(self.bitsets.words.shape, (40, -(-len(self.bitsets.genre_ids) // 64)))
+        self.assertEqual(self.bitsets.counts.tolist(), [len(names) for _, names in self.genres])
+
+    def test_bitfield_matches_genres(self):
+        dense = self._dense()
+        for row, (book_id, _) in enumerate(self.genres):
+            self.assertEqual(self.bitsets.bitfield(book_id), dense[row].tolist())
+
+    def test_cosine_similarities(self):
+        dense = self._dense()
+        norms = np.linalg.norm(dense, axis=1)
+        for row, (book_id, _) in enumerate(self.genres):
+            expected = np.divide(dense @ dense[row], norms * norms[row], out=np.zeros(len(dense)), where=norms * norms[row] > 0)
+            np.testing.assert_allclose(self.bitsets.similarities(book_id), expected)
+
+    def test_jaccard_similarities(self):
+        dense = self._dense().astype(bool)
+        row = 3
+        union = (dense | dense[row]).sum(axis=1)
+        expected = np.divide((dense & dense[row]).sum(axis=1), union, out=np.zeros(len(dense)), where=union > 0)
+        np.testing.assert_allclose(self.bitsets.similarities(30, 'jaccard'), expected)
+
+    def test_all_pairs_in_blocks(self):
+        blocks = list(self.bitsets.all_pairs('jaccard', max_bytes=40 * self.bitsets.words.shape[1] * 8 * 7))
+        self.assertEqual([start for start, _ in blocks], list(range(0, 40, 7)))
+        matrix = np.vstack([block for _, block in blocks])
+        for row, (book_id, _) in enumerate(self.genres):
+            np.testing.assert_allclose(matrix[row], self.bitsets.similarities(book_id, 'jaccard'))
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            self.bitsets.similarities(0, 'euclidean')
@@ -0,0 +1,125 @@
+"""Unit tests for the genre inverted index."""
+import math
+
+from bookclub.models import Book, User
+from bookclub.recommender.GenreSimilarityModel import GenreSimilarityModel
+from bookclub.recommender.genres import GenreIndex
+from django.test import TestCase
+
+
+class GenreIndexTestCase(TestCase):
+    """Unit tests for the genre inverted index."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json']
+
+    def setUp(self):
+        self._set_genre(1, 'fiction,fantasy,fantasy')
+        self._set_genre(2, 'fiction,history')
+        self._set_genre(3, 'poetry')
+        self.user = User.objects.get(id=1)
+
+    def _set_genre(self, book_id, genre):
+        book = Book.objects.get(id=book_id)
+        book.genre = genre
+        book.save()
+
+    def _cosine(self, first, second):
+        first, second = set(first.split(',')), set(second.split(','))
+        return len(first & second) / math.sqrt(len(first) * len(second))
+
+    def test_similarities_are_cosines(self):
+        index = GenreIndex()
+        books = {book.id: book.genre for book in Book.objects.all()}
+        book_ids, similarity = index.similarities(1)
+        self.assertEqual(book_ids.tolist(), [1, 2])
+        for book_id, value in zip(book_ids.tolist(), similarity.tolist()):
+            self.assertAlmostEqual(value, self._cosine(books[1], books[book_id]))
+
+    def test_reload_uses_one_query(self):
+        with self.assertNumQueries(1):
+            GenreIndex().reload()
+
+    def test_index_is_reused_between_calls(self):
+        index = GenreIndex(ttl=3600)
+        index.reload()
+        with self.assertNumQueries(0):
+            index.similarities(1)
+            index.similarities(2)
+
+    def test_saved_books_update_postings(self):
+        index = GenreIndex(ttl=3600)
+        index.reload()
+        book = Book.objects.get(id=3)
+        book.genre = 'fiction'
+        index.book_changed(Book, book)
+        self.assertEqual(index.similarities(1)[0].tolist(), [1, 2, 3])
+        book.genre = 'poetry'
+        index.book_changed(Book, book)
+        self.assertEqual(index.similarities(1)[0].tolist(), [1, 2])
+
+    def test_deleted_books_leave_postings(self):
+        index = GenreIndex(ttl=3600)
+        index.reload()
+        index.book_deleted(Book, Book.objects.get(id=2))
+        self.assertEqual(index.similarities(1)[0].tolist(), [1])
+        self.assertIsNone(index._genres.get(2))
+
+    def test_index_rebuilds_for_unknown_book(self):
+        index = GenreIndex(ttl=3600)
+        index.reload()
+        self._set_genre(3, 'fiction')
+        book = Book.objects.create(ISBN='380000059', title='New', author='Someone', genre='poetry')
+        self.assertEqual(index.genres(book.id), frozenset(['poetry']))
+        self.assertEqual(index.similarities(1)[0].tolist(), [1, 2, 3])
+
+    def test_candidates_only_come_from_shared_genres(self):
+        index = GenreIndex()
+        book_ids, similarity = index.similarities(3)
+        self.assertEqual(book_ids.tolist(), [3])
+        self.assertEqual(similarity.tolist(), [1.0])
+
+    def test_recommendations_for_book(self):
+        recommendations = GenreSimilarityModel().get_recommendations_for_book(self.user.id, 1)
+        self.assertEqual(list(recommendations), [2])
+        self.assertAlmostEqual(recommendations[2], self._cosine('fiction,fantasy', 'fiction,history'))
+
+    def test_recommendations_for_book_skip_read_books(self):
+        self.user.all_books.add(2)
+        self.assertEqual(GenreSimilarityModel().get_recommendations_for_book(self.user.id, 1), {})
+
+    def test_recommendations_for_missing_book(self):
+        with self.assertRaises(Book.DoesNotExist):
+            GenreSimilarityModel().get_recommendations_for_book(self.user.id, 999)
+
+    def test_genre_recommendations_sum_similarities(self):
+        Book.objects.get(id=3).readers.add(self.user)
+        self._set_genre(3, 'fiction,poetry')
+        Book.objects.get(id=1).readers.add(self.user)
+        recommendations = GenreSimilarityModel().get_genre_recommendations(self.user.id, 'sum')
+        self.assertEqual(recommendations, [2])
+
+    def test_genre_recommendations_max_and_sum_order(self):
+        self._set_genre(1, 'fiction,history')
+        self._set_genre(2, 'fiction')
+        self._set_genre(3, 'history')
+        Book.objects.get(id=3).readers.add(self.user)
+        Book.objects.create(ISBN='380000059', title='New', author='Someone', genre='fiction').readers.add(self.user)
+        model = GenreSimilarityModel()
+        self.assertEqual(model.get_genre_recommendations(self.user.id, 'sum'), [1, 2])
+        self.assertEqual(model.get_genre_recommendations(self.user.id, 'max'), [2, 1])
+
+    def test_genre_recommendations_skip_own_and_read_books(self):
+        Book.objects.get(id=1).readers.add(self.user)
+        Book.objects.get(id=2).readers.add(self.user)
+        self.assertEqual(GenreSimilarityModel().get_genre_recommendations(self.user.id), [])
+
+    def test_genre_recommendations_query_count_does_not_grow(self):
+        Book.objects.get(id=1).readers.add(self.user)
+        with self.assertNumQueries(3):
+            GenreSimilarityModel().get_genre_recommendations(self.user.id)
+        Book.objects.get(id=3).readers.add(self.user)
+        with self.assertNumQueries(3):
+            GenreSimilarityModel().get_genre_recommendations(self.user.id)
@@ -0,0 +1,34 @@
+"""Unit tests for the recommended books hydration."""
+from bookclub.models import Book
+from bookclub.recommender.hydration import BOOK_CARD_FIELDS, hydrate_books
+from django.test import TestCase
+
+
+class HydrateBooksTestCase(TestCase):
+    """Unit tests for the recommended books hydration."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json']
+
+    def test_books_keep_ranking_order(self):
+        book_ids = list(Book.objects.values_list('id', flat=True))[::-1]
+        with self.assertNumQueries(1):
+            books = hydrate_books(book_ids)
+        self.assertEqual([book.id for book in books], book_ids)
+
+    def test_deleted_books_are_skipped(self):
+        book_ids = list(Book.objects.values_list('id', flat=True))
+        Book.objects.filter(id=book_ids[0]).delete()
+        books = hydrate_books(book_ids + [9999])
+        self.assertEqual([book.id for book in books], book_ids[1:])
+
+    def test_only_card_fields_are_loaded(self):
+        book = hydrate_books([Book.objects.first().id])[0]
+        loaded = {field.attname for field in Book._meta.concrete_fields} - book.get_deferred_fields()
+        self.assertEqual(loaded, set(BOOK_CARD_FIELDS))
+
+    def test_no_ids(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(hydrate_books([]), [])
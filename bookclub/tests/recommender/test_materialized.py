@@ -0,0 +1,84 @@
+"""Unit tests for the materialized user recommendations."""
+from bookclub.models import Book, Rating, User, UserRecommendation
+from bookclub.recommender.materialized import RecommendationRefresher
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+from django.utils import timezone
+
+
+class RecommendationRefresherTestCase(TestCase):
+    """Unit tests for the materialized user recommendations."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.rec_helper = RecommenderHelper()
+        self.rec_helper.set_model(train_model())
+        self.refresher = RecommendationRefresher(self.rec_helper, background=False)
+        self.user = User.objects.get(id=1)
+
+    def test_missing_entry_is_computed(self):
+        book_ids = self.refresher.get_book_ids(self.user.id, 3)
+        entry = UserRecommendation.objects.get(user=self.user)
+        self.assertEqual(book_ids, entry.book_ids[:3])
+        self.assertFalse(entry.is_stale)
+        self.assertEqual(entry.model_version, self.rec_helper.model.version)
+
+    def test_fresh_entry_is_one_query(self):
+        self.refresher.refresh(self.user.id)
+        with self.assertNumQueries(1):
+            self.refresher.get_book_ids(self.user.id, 3)
+
+    def test_get_books_keeps_ranking(self):
+        book_ids = self.refresher.refresh(self.user.id)
+        books = self.refresher.get_books(self.user.id, 3)
+        self.assertEqual([book.id for book in books], book_ids[:3])
+
+    def test_rating_save_marks_entry_stale(self):
+        self.refresher.refresh(self.user.id)
+        rating = Rating.objects.filter(user=self.user).first()
+        rating.rating = 3
+        rating.save()
+        self.assertTrue(UserRecommendation.objects.get(user=self.user).is_stale)
+
+    def test_reading_list_changes_mark_entry_stale(self):
+        book = Book.objects.get(id=2)
+        self.refresher.refresh(self.user.id)
+        book.add_reader(self.user)
+        self.assertTrue(UserRecommendation.objects.get(user=self.user).is_stale)
+
+        self.refresher.refresh(self.user.id)
+        book.remove_reader(self.user)
+        self.assertTrue(UserRecommendation.objects.get(user=self.user).is_stale)
+
+    def test_stale_entry_is_refreshed(self):
+        self.refresher.refresh(self.user.id)
+        UserRecommendation.mark_all_stale()
+        self.refresher.get_book_ids(self.user.id, 3)
+        self.assertFalse(UserRecommendation.objects.get(user=self.user).is_stale)
+
+    def test_invalidation_during_refresh_keeps_entry_stale(self):
+        compute = self.refresher.compute
+
+        def compute_and_invalidate(user_id):
+            book_ids = compute(user_id)
+            UserRecommendation.objects.filter(user_id=user_id).update(is_stale=True, invalidated_at=timezone.now())
+            return book_ids
+
+        self.refresher.refresh(self.user.id)
+        self.refresher.compute = compute_and_invalidate
+        self.refresher.refresh(self.user.id)
+        self.assertTrue(UserRecommendation.objects.get(user=self.user).is_stale)
+
+    def test_refresh_stale(self):
+        self.refresher.refresh(self.user.id)
+        self.refresher.refresh(2)
+        UserRecommendation.mark_stale(self.user.id)
+        self.assertEqual(self.refresher.refresh_stale(), 1)
+        self.assertFalse(UserRecommendation.objects.filter(is_stale=True).exists())
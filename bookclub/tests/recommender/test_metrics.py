@@ -0,0 +1,68 @@
+"""Unit tests for the recommendation pipeline metrics."""
+import json
+import os
+import tempfile
+
+from bookclub.models import User
+from bookclub.recommender.metrics import PipelineMetrics
+from django.test import TestCase
+
+
+class PipelineMetricsTestCase(TestCase):
+    """Unit tests for the recommendation pipeline metrics."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metrics = PipelineMetrics(window=4, directory=self.tmp_dir.name, flush_interval=3600)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_stage_counts_calls_and_queries(self):
+        for _ in range(2):
+            with self.metrics.stage('filtering'):
+                User.objects.count()
+                User.objects.count()
+        stage = self.metrics.summary()['stages']['filtering']
+        self.assertEqual(stage['calls'], 2)
+        self.assertEqual(stage['queries_per_call'], 2.0)
+        self.assertLessEqual(stage['p50_ms'], stage['p99_ms'])
+
+    def test_nested_stages_count_their_own_queries(self):
+        with self.metrics.stage('recommendation'):
+            User.objects.count()
+            with self.metrics.stage('hydration'):
+                User.objects.count()
+        stages = self.metrics.summary()['stages']
+        self.assertEqual(stages['recommendation']['queries_per_call'], 2.0)
+        self.assertEqual(stages['hydration']['queries_per_call'], 1.0)
+
+    def test_only_recent_durations_are_kept(self):
+        for _ in range(10):
+            with self.metrics.stage('ranking'):
+                pass
+        self.assertEqual(len(self.metrics.snapshot()['stages']['ranking']['durations']), 4)
+        self.assertEqual(self.metrics.snapshot()['stages']['ranking']['calls'], 10)
+
+    def test_summary_merges_processes(self):
+        other = PipelineMetrics()
+        with other.stage('ranking'):
+            pass
+        other.count('candidates_scored', 5)
+        with open(os.path.join(self.tmp_dir.name, '0.json'), 'w') as metrics_file:
+            json.dump(other.snapshot(), metrics_file)
+
+        with self.metrics.stage('ranking'):
+            pass
+        self.metrics.count('candidates_scored', 3)
+        summary = self.metrics.summary()
+        self.assertEqual(summary['stages']['ranking']['calls'], 2)
+        self.assertEqual(summary['counters']['candidates_scored'], 8)
+
+    def test_clear_removes_flushed_metrics(self):
+        self.metrics.count('candidates_scored')
+        self.metrics.flush()
+        self.metrics.clear()
+        self.assertEqual(self.metrics.summary(), {'stages': {}, 'counters': {}})
@@ -0,0 +1,77 @@
+"""Unit tests for the sparse item neighbour index."""
+from unittest import mock
+
+import numpy as np
+from bookclub.recommender import neighbors
+from bookclub.recommender.neighbors import ItemNeighborIndex
+from django.test import TestCase
+from scipy.sparse import random as sparse_random
+
+
+class ItemNeighborIndexTestCase(TestCase):
+    """Unit tests for the sparse item neighbour index."""
+
+    def setUp(self):
+        self.ratings = sparse_random(30, 25, density=0.3, format='csr', random_state=0) * 10
+        dense = self.ratings.toarray().T
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        normalized = np.divide(dense, norms, out=np.zeros_like(dense), where=norms > 0)
+        self.similarities = normalized @ normalized.T
+        np.fill_diagonal(self.similarities, -np.inf)
+
+    def _expected_neighbors(self, item, k):
+        row = self.similarities[item]
+        order = sorted(np.flatnonzero(row > 0), key=lambda other: (-row[other], other))[:k]
+        return order, row[order]
+
+    def test_index_keeps_top_k_positive_neighbors(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        self.assertEqual(index.n_items, 25)
+        for item in range(25):
+            indices, scores = index.neighbors(item)
+            expected_indices, expected_scores = self._expected_neighbors(item, 5)
+            self.assertEqual(list(indices), list(expected_indices))
+            self.assertTrue(np.allclose(scores, expected_scores, atol=1e-6))
+            self.assertNotIn(item, indices)
+
+    def test_index_is_the_same_when_built_in_small_blocks(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        with mock.patch.object(neighbors, 'BLOCK_CELLS', 30):
+            blocked = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        self.assertTrue(np.array_equal(index.indptr, blocked.indptr))
+        self.assertTrue(np.array_equal(index.indices, blocked.indices))
+
+    def test_index_uses_compact_types(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        self.assertEqual(index.indices.dtype, np.int32)
+        self.assertEqual(index.scores.dtype, np.float32)
+
+    def test_candidates_sum_weighted_neighbor_scores(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        expected = {}
+        for row, weight in [(0, 1.0), (3, 0.5)]:
+            indices, scores = index.neighbors(row)
+            for item, score in zip(indices, scores):
+                expected[item] = expected.get(item, 0) + score * weight
+        items, totals = index.candidates([0, 3], [1.0, 0.5])
+        self.assertEqual(list(items), sorted(expected))
+        self.assertTrue(np.allclose(totals, [expected[item] for item in items]))
+
+    def test_candidates_of_no_rows(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        items, totals = index.candidates([], [])
+        self.assertEqual(len(items), 0)
+        self.assertEqual(len(totals), 0)
+
+    def test_batch_candidates_match_per_user_candidates(self):
+        index = ItemNeighborIndex.from_ratings(self.ratings, k=5)
+        users = [([0, 3], [1.0, 0.5]), ([], []), ([7, 3, 12], [0.2, 0.9, 0.4])]
+        groups = [position for position, (rows, _) in enumerate(users) for _ in rows]
+        rows = [row for user_rows, _ in users for row in user_rows]
+        weights = [weight for _, user_weights in users for weight in user_weights]
+
+        owners, items, totals = index.batch_candidates(groups, rows, weights)
+        for position, (user_rows, user_weights) in enumerate(users):
+            expected_items, expected_totals = index.candidates(user_rows, user_weights)
+            self.assertEqual(list(items[owners == position]), list(expected_items))
+            self.assertEqual(list(totals[owners == position]), list(expected_totals))
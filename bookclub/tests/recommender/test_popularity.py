@@ -0,0 +1,67 @@
+"""Unit tests for the cached popularity ranking."""
+from bookclub.models import Book
+from bookclub.recommender.popularity import PopularityRanking
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase
+
+
+class PopularityRankingTestCase(TestCase):
+    """Unit tests for the cached popularity ranking."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json']
+
+    def setUp(self):
+        self.ranking = PopularityRanking(size=3, ttl=3600)
+        post_save.connect(self.ranking.book_changed, sender=Book)
+        post_delete.connect(self.ranking.book_deleted, sender=Book)
+
+    def tearDown(self):
+        post_save.disconnect(self.ranking.book_changed, sender=Book)
+        post_delete.disconnect(self.ranking.book_deleted, sender=Book)
+
+    def _expected(self, books=None):
+        books = Book.objects.all() if books is None else books
+        return list(books.order_by('-average_rating', '-readers_count', 'id').values_list('id', flat=True))
+
+    def test_ranking_matches_database_order(self):
+        self.assertEqual(self.ranking.get_book_ids(3), self._expected()[:3])
+
+    def test_cached_ranking_needs_no_queries(self):
+        self.ranking.get_book_ids(3)
+        with self.assertNumQueries(0):
+            self.ranking.get_book_ids(2)
+
+    def test_rating_change_moves_book(self):
+        self.ranking.get_book_ids(3)
+        book = Book.objects.get(id=self._expected()[-1])
+        book.average_rating = 10
+        book.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ranking.get_book_ids(1), [book.id])
+
+    def test_book_dropping_out_of_kept_prefix_is_removed(self):
+        self.ranking.get_book_ids(3)
+        book = Book.objects.get(id=self._expected()[0])
+        book.average_rating = -1
+        book.save()
+        self.assertEqual(self.ranking.get_book_ids(3), self._expected()[:3])
+
+    def test_deleted_book_is_dropped(self):
+        first = self._expected()[0]
+        self.ranking.get_book_ids(3)
+        Book.objects.get(id=first).delete()
+        self.assertNotIn(first, self.ranking.get_book_ids(3))
+
+    def test_exclude_and_genre_filters(self):
+        book = Book.objects.first()
+        book.genre = 'Fantasy,Rare'
+        book.save()
+        self.assertEqual(self.ranking.get_book_ids(5, genres=['Rare']), [book.id])
+        self.assertNotIn(book.id, self.ranking.get_book_ids(5, exclude=[book.id]))
+
+    def test_lookups_past_kept_prefix_use_database(self):
+        ranking = PopularityRanking(size=1, ttl=3600)
+        self.assertEqual(ranking.get_book_ids(3), self._expected()[:3])
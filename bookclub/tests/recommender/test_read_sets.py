@@ -0,0 +1,41 @@
+"""Unit tests for the shared read set provider."""
+from bookclub.models import User
+from bookclub.recommender.read_sets import ReadSet, ReadSetProvider
+from django.test import TestCase
+
+
+class ReadSetTestCase(TestCase):
+    """Unit tests for the shared read set provider."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json']
+
+    def test_contains_masks_read_books(self):
+        read = ReadSet([7, 3, 3, 11])
+        self.assertEqual(len(read), 3)
+        self.assertEqual(list(read.contains([1, 3, 7, 8, 11, 12])), [False, True, True, False, True, False])
+        self.assertIn(7, read)
+        self.assertNotIn(8, read)
+
+    def test_empty_read_set(self):
+        read = ReadSet([])
+        self.assertEqual(list(read.contains([1, 2])), [False, False])
+        self.assertNotIn(1, read)
+
+    def test_read_sets_are_loaded_once(self):
+        User.objects.get(id=1).all_books.add(1, 2)
+        provider = ReadSetProvider()
+        with self.assertNumQueries(1):
+            read_sets = provider.get_many([1, 2])
+            provider.get(1)
+        self.assertEqual(list(read_sets[1].book_ids), [1, 2])
+        self.assertEqual(len(read_sets[2]), 0)
+
+    def test_invalidate_reloads_read_set(self):
+        provider = ReadSetProvider()
+        provider.get(1)
+        User.objects.get(id=1).all_books.add(1)
+        provider.invalidate(1)
+        self.assertIn(1, provider.get(1))
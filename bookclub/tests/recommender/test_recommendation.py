@@ -0,0 +1,121 @@
+"""Unit tests for the club, batch and cold-start recommendations."""
+import numpy as np
+from bookclub.models import Book, Club, Rating, User
+from bookclub.recommender.recommendation import Recommendation
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+
+
+class ClubRecommendationTestCase(TestCase):
+    """Unit tests for the club recommendations."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json',
+                'bookclub/tests/fixtures/default_club.json']
+
+    def setUp(self):
+        self.rec_helper = RecommenderHelper()
+        self.rec_helper.set_model(train_model())
+        self.club = Club.objects.get(id=1)
+        self.club.members.add(1)
+
+    def _recommend(self, num_of_rec=3):
+        return Recommendation(True, self.rec_helper).get_recommendations(None, num_of_rec, club_id=self.club.id)
+
+    def test_club_books_are_excluded(self):
+        book = Book.objects.get(id=1)
+        book.add_club(self.club)
+        recommendations = self._recommend(len(self.rec_helper.model.raw_iids))
+        self.assertTrue(recommendations)
+        self.assertNotIn(book, recommendations)
+
+    def test_club_profile_averages_members(self):
+        model = self.rec_helper.model
+        members = [member for member in self.club.members.values_list('id', flat=True) if model.knows_user(member)]
+        profile = np.mean([model.get_user_factors(member)[0] for member in members], axis=0)
+        scores = model.item_biases + model.item_factors @ profile
+        expected = sorted(range(model.n_items), key=lambda item: (-scores[item], item))[:3]
+        recommendations = self._recommend()
+        self.assertEqual([book.id for book in recommendations], [model.to_raw_iid(item) for item in expected])
+
+    def test_club_without_known_members_gets_popular_books(self):
+        self.club.members.set([User.objects.get(id=3)])
+        Rating.objects.filter(user_id=3).delete()
+        recommendations = self._recommend()
+        expected = list(Book.objects.order_by('-average_rating', '-readers_count')[:3])
+        self.assertEqual(recommendations, expected)
+
+    def test_query_count_does_not_grow_with_members(self):
+        self._recommend()
+        with self.assertNumQueries(5):
+            self._recommend()
+        for user in User.objects.exclude(id__in=self.club.members.all()):
+            self.club.members.add(user)
+        with self.assertNumQueries(5):
+            self._recommend()
+
+
+class BatchRecommendationTestCase(TestCase):
+    """Unit tests for the batch recommendations."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        User.objects.get(id=4).all_books.add(1)
+        Book.objects.get(id=2).readers.add(User.objects.get(id=5))
+        self.rec_helper = RecommenderHelper()
+        self.rec_helper.set_model(train_model())
+
+    def _batch(self, user_ids):
+        return Recommendation(True, self.rec_helper).get_recommendations_batch(user_ids, 2)
+
+    def test_batch_matches_single_user_recommendations(self):
+        user_ids = [1, 2, 3, 4, 5, 6]
+        batch = self._batch(user_ids)
+        for user_id in user_ids:
+            expected = Recommendation(True, self.rec_helper).get_recommendation_ids(None, 2, user_id)
+            self.assertEqual(batch[user_id], expected)
+
+    def test_query_count_does_not_grow_with_cold_users(self):
+        with self.assertNumQueries(7):
+            self._batch([3, 6])
+        with self.assertNumQueries(7):
+            self._batch([3, 4, 5, 6])
+
+
+class ColdStartRecommendationTestCase(TestCase):
+    """Unit tests for recommendations before the first model is trained."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json',
+                'bookclub/tests/fixtures/default_club.json']
+
+    def setUp(self):
+        self.rec_helper = RecommenderHelper()
+        self.popular = list(Book.objects.order_by('-average_rating', '-readers_count', 'id').values_list('id', flat=True))
+
+    def test_rated_users_get_popular_books_without_training(self):
+        recommendation = Recommendation(True, self.rec_helper)
+        self.assertEqual(recommendation.get_recommendation_ids(None, 2, user_id=1), self.popular[:2])
+        self.assertEqual(recommendation.get_recommendations_batch([1, 2], 2), {1: self.popular[:2], 2: self.popular[:2]})
+        self.assertIsNone(self.rec_helper.model)
+
+    def test_clubs_get_popular_books_without_training(self):
+        recommendations = Recommendation(True, self.rec_helper).get_recommendation_ids(None, 2, club_id=1)
+        self.assertEqual(recommendations, [book_id for book_id in self.popular if book_id not in
+                                           Club.objects.get(id=1).books.values_list('id', flat=True)][:2])
+        self.assertIsNone(self.rec_helper.model)
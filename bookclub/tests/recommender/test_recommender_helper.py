@@ -0,0 +1,87 @@
+"""Unit tests for the recommender model snapshots."""
+import threading
+
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+
+
+class RecommenderHelperTestCase(TestCase):
+    """Unit tests for the recommender model snapshots."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.rec_helper = RecommenderHelper()
+        self.first = train_model()
+        self.second = train_model()
+        self.rec_helper.set_model(self.first)
+
+    def test_pinned_snapshot_survives_swap(self):
+        with self.rec_helper.pin() as model:
+            self.rec_helper.set_model(self.second)
+            self.assertIs(model, self.first)
+            self.assertIs(self.rec_helper.model, self.first)
+            self.assertIsNotNone(self.first.item_factors)
+        self.assertIs(self.rec_helper.model, self.second)
+
+    def test_swapped_out_snapshot_is_released_after_last_reader(self):
+        with self.rec_helper.pin():
+            with self.rec_helper.pin() as nested:
+                self.assertIs(nested, self.first)
+            self.rec_helper.set_model(self.second)
+            self.assertEqual(self.first.readers, 1)
+            self.assertFalse(self.first.item_factors is None)
+        self.assertEqual(self.first.readers, 0)
+        self.assertIsNone(self.first.item_factors)
+
+    def test_unread_snapshot_is_released_on_swap(self):
+        self.rec_helper.set_model(self.second)
+        self.assertIsNone(self.first.neighbors)
+        self.assertIsNotNone(self.second.neighbors)
+
+    def test_empty_pin_pins_the_first_model_it_reads(self):
+        rec_helper = RecommenderHelper()
+        with rec_helper.pin() as model:
+            self.assertIsNone(model)
+            rec_helper.set_model(self.first)
+            self.assertIs(rec_helper.model, self.first)
+            self.assertEqual(self.first.readers, 1)
+            rec_helper.set_model(self.second)
+            self.assertIs(rec_helper.model, self.first)
+            self.assertIsNotNone(self.first.item_factors)
+        self.assertEqual(self.first.readers, 0)
+        self.assertIsNone(self.first.item_factors)
+        self.assertIs(rec_helper.model, self.second)
+
+    def test_empty_pin_keeps_a_model_published_by_another_thread(self):
+        rec_helper = RecommenderHelper()
+        with rec_helper.pin():
+            publish = threading.Thread(target=rec_helper.set_model, args=(self.first,))
+            publish.start()
+            publish.join()
+            self.assertIs(rec_helper.model, self.first)
+            publish = threading.Thread(target=rec_helper.set_model, args=(self.second,))
+            publish.start()
+            publish.join()
+            self.assertIs(rec_helper.model, self.first)
+            self.assertIsNotNone(self.first.item_factors)
+        self.assertIsNone(self.first.item_factors)
+
+    def test_pins_are_per_thread(self):
+        seen = []
+        with self.rec_helper.pin():
+            self.rec_helper.set_model(self.second)
+            thread = threading.Thread(target=lambda: seen.append(self.rec_helper.model))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [self.second])
+
+    def test_snapshot_arrays_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.first.item_factors[0, 0] = 1.0
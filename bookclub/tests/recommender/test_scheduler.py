@@ -0,0 +1,114 @@
+"""Unit tests for the recommender retraining scheduler."""
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+
+from bookclub.models import Rating, TrainingState
+from bookclub.recommender.recommendation import Recommendation
+from bookclub.recommender.scheduler import RetrainScheduler
+from bookclub.recommender.worker import train_artifact
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+
+class RetrainSchedulerTestCase(TestCase):
+    """Unit tests for the recommender retraining scheduler."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            RECOMMENDER_ARTIFACT_DIR=self.tmp_dir.name,
+            RECOMMENDER_RETRAIN_AFTER_RATINGS=2,
+            RECOMMENDER_STALENESS_CHECK_INTERVAL=0,
+        )
+        self.settings_override.enable()
+        self.rec_helper = RecommenderHelper()
+        self.scheduler = RetrainScheduler(self.rec_helper, background=False)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp_dir.cleanup()
+
+    def _mark_trained(self, when):
+        TrainingState.objects.filter(pk=TrainingState.get_state().pk).update(last_trained_at=when)
+
+    def test_never_trained_model_is_stale(self):
+        self.assertTrue(self.scheduler.is_stale(TrainingState.get_state()))
+
+    def test_maybe_retrain_trains_and_records_state(self):
+        self.assertTrue(self.scheduler.maybe_retrain())
+        state = TrainingState.get_state()
+        self.assertEqual(state.status, TrainingState.Status.IDLE)
+        self.assertIsNotNone(state.last_trained_at)
+        self.assertIsNotNone(state.last_duration)
+        self.assertEqual(state.model_version, self.rec_helper.model.version)
+
+    def test_fresh_model_is_not_retrained(self):
+        self.scheduler.maybe_retrain()
+        self.assertFalse(self.scheduler.maybe_retrain())
+
+    def test_stale_after_enough_changed_ratings(self):
+        self._mark_trained(timezone.now())
+        self.assertFalse(self.scheduler.is_stale(TrainingState.get_state()))
+        for rating in Rating.objects.all()[:2]:
+            rating.save()
+        self.assertTrue(self.scheduler.is_stale(TrainingState.get_state()))
+
+    def test_stale_after_interval_with_a_change(self):
+        self._mark_trained(timezone.now() - timedelta(hours=2))
+        Rating.objects.update(updated_at=timezone.now() - timedelta(hours=3))
+        self.assertFalse(self.scheduler.is_stale(TrainingState.get_state()))
+        Rating.objects.first().save()
+        self.assertTrue(self.scheduler.is_stale(TrainingState.get_state()))
+
+    def test_only_one_job_can_claim_training(self):
+        TrainingState.get_state()
+        self.assertTrue(self.scheduler.claim())
+        self.assertFalse(self.scheduler.claim())
+        self.assertFalse(self.scheduler.train_now())
+
+    def test_blocked_retrain_is_counted_as_pending(self):
+        TrainingState.get_state()
+        self.scheduler.claim()
+        self.assertFalse(self.scheduler.maybe_retrain())
+        self.assertEqual(self.scheduler.status()['queue_depth'], 1)
+        self.assertTrue(self.scheduler.status()['running'])
+
+    def test_expired_claim_can_be_taken_over(self):
+        TrainingState.get_state()
+        self.scheduler.claim()
+        TrainingState.objects.update(started_at=timezone.now() - timedelta(days=1))
+        self.assertTrue(self.scheduler.claim())
+
+    def test_other_workers_reload_published_model(self):
+        self.scheduler.train_now()
+        other_helper = RecommenderHelper()
+        RetrainScheduler(other_helper, background=False).maybe_retrain()
+        self.assertEqual(other_helper.model.version, self.rec_helper.model.version)
+
+    def test_out_of_process_run_swaps_in_saved_artifact(self):
+        TrainingState.get_state()
+        self.scheduler.claim()
+        with mock.patch('bookclub.recommender.scheduler.train_out_of_process', side_effect=train_artifact) as train:
+            model = self.scheduler.run(out_of_process=True)
+        train.assert_called_once()
+        self.assertIs(self.rec_helper.model, model)
+        self.assertIsInstance(model.item_factors, np.memmap)
+        self.assertEqual(TrainingState.get_state().model_version, model.version)
+
+    def test_cold_start_requests_leave_training_to_the_claim(self):
+        TrainingState.get_state()
+        self.scheduler.claim()
+        self.assertFalse(self.scheduler.maybe_retrain())
+        Recommendation(True, self.rec_helper).get_recommendation_ids(None, 2, user_id=1)
+        self.assertIsNone(self.rec_helper.model)
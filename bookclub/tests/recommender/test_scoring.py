@@ -0,0 +1,34 @@
+"""Unit tests for the vectorized candidate scoring helpers."""
+from operator import itemgetter
+
+import numpy as np
+from bookclub.recommender.scoring import top_n
+from django.test import TestCase
+
+
+class ScoringTestCase(TestCase):
+    """Unit tests for the vectorized candidate scoring helpers."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.similarity_matrix = np.round(rng.random((40, 40)), 1)
+        self.neighbors = [(3, 1.0), (7, 0.8), (12, 0.5)]
+
+    def test_top_n_matches_stable_sort(self):
+        rows, weights = zip(*self.neighbors)
+        scores = np.array(weights) @ self.similarity_matrix[list(rows)]
+        expected = [itemID for itemID, _ in sorted(enumerate(scores), key=itemgetter(1), reverse=True)][:10]
+        self.assertEqual(list(top_n(scores, 10)), expected)
+
+    def test_top_n_breaks_ties_by_index(self):
+        scores = np.array([1.0, 2.0, 2.0, 0.5, 2.0])
+        self.assertEqual(list(top_n(scores, 2)), [1, 2])
+
+    def test_top_n_skips_excluded(self):
+        scores = np.array([1.0, 2.0, 3.0, 0.5])
+        exclude = np.array([False, True, True, False])
+        self.assertEqual(list(top_n(scores, 3, exclude)), [0, 3])
+
+    def test_top_n_with_no_candidates(self):
+        self.assertEqual(len(top_n(np.zeros(0), 5)), 0)
+        self.assertEqual(len(top_n(np.ones(3), 0)), 0)
@@ -0,0 +1,78 @@
+"""Unit tests for the shared memory model distribution."""
+import tempfile
+from multiprocessing import shared_memory
+
+import numpy as np
+from bookclub.recommender import shared
+from bookclub.recommender.artifacts import ModelArtifact
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+
+
+class SharedModelTestCase(TestCase):
+    """Unit tests for the shared memory model distribution."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.model = train_model()
+
+    def tearDown(self):
+        shared.unpublish(self.root)
+        self.tmp_dir.cleanup()
+
+    def test_attach_without_published_model(self):
+        self.assertIsNone(shared.attach(self.root))
+
+    def test_attached_model_matches_published_model(self):
+        shared.publish(self.model, self.root)
+        attached = shared.attach(self.root)
+        self.assertEqual(attached.version, self.model.version)
+        self.assertEqual(attached.trained_at, self.model.trained_at)
+        for name in ModelArtifact.ARRAYS:
+            self.assertTrue(np.array_equal(getattr(attached, name), getattr(self.model, name)))
+        self.assertEqual(attached.user_ratings(0), self.model.user_ratings(0))
+
+    def test_attached_arrays_are_read_only(self):
+        shared.publish(self.model, self.root)
+        attached = shared.attach(self.root)
+        with self.assertRaises(ValueError):
+            attached.item_factors[0, 0] = 1.0
+
+    def test_release_closes_the_segment(self):
+        shared.publish(self.model, self.root)
+        attached = shared.attach(self.root)
+        segment = attached.segment
+        attached.release()
+        self.assertIsNone(segment.buf)
+        self.assertIsNone(attached.segment)
+
+    def test_new_version_unlinks_previous_segment(self):
+        shared.publish(self.model, self.root)
+        old_segment = shared.read_manifest(self.root)['segment']
+        attached = shared.attach(self.root)
+
+        newer = train_model()
+        shared.publish(newer, self.root)
+        self.assertEqual(shared.attach(self.root).version, newer.version)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=old_segment)
+        self.assertTrue(np.array_equal(attached.item_factors, self.model.item_factors))
+
+    def test_helper_prefers_shared_model(self):
+        self.model.save(self.root)
+        newer = train_model()
+        shared.publish(newer, self.root)
+        rec_helper = RecommenderHelper()
+        self.assertTrue(rec_helper.load_latest(self.root, shared_memory=True))
+        self.assertEqual(rec_helper.model.version, newer.version)
+        self.assertTrue(rec_helper.load_latest(self.root))
+        self.assertEqual(rec_helper.model.version, self.model.version)
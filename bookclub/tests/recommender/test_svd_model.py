@@ -0,0 +1,75 @@
+"""Unit tests for the SVD recommender model."""
+from bookclub.models import Rating, User
+from bookclub.recommender.SVDModel import SVDModel
+from bookclub.recommender.training import train_model
+from bookclub.recommender_helper import RecommenderHelper
+from django.test import TestCase
+
+
+class SVDModelTestCase(TestCase):
+    """Unit tests for the SVD recommender model."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def setUp(self):
+        self.rec_helper = RecommenderHelper()
+        self.rec_helper.set_model(train_model())
+        self.svd_model = SVDModel(self.rec_helper)
+        self.model = self.rec_helper.model
+
+    def test_unchanged_user_is_not_folded_in(self):
+        self.svd_model.refresh_user(1)
+        self.assertEqual(self.model.folded_at(1), self.model.trained_at)
+
+    def test_edited_rating_is_folded_in(self):
+        rating = Rating.objects.get(id=1)
+        rating.rating = 9
+        rating.save()
+        self.svd_model.get_recommendations(1, 3)
+        ratings = dict(self.model.get_user_ratings(1))
+        self.assertEqual(ratings[self.model.to_inner_iid(1)], 9.0)
+        self.assertGreater(self.model.folded_at(1), self.model.trained_at)
+
+    def test_new_user_is_folded_in(self):
+        user = User.objects.get(id=3)
+        Rating.objects.create(user=user, book_id=2, rating=8)
+        with self.assertRaises(ValueError):
+            self.model.to_inner_uid(3)
+        recommendations = self.svd_model.get_recommendations(3, 3)
+        self.assertLessEqual(len(recommendations), 3)
+        self.assertEqual(self.model.get_user_ratings(3), [(self.model.to_inner_iid(2), 8.0)])
+
+    def test_fold_in_solves_user_factors(self):
+        Rating.objects.create(user_id=3, book_id=1, rating=10)
+        self.svd_model.fold_in(3)
+        factors, bias = self.model.get_user_factors(3)
+        self.assertEqual(factors.shape, (self.model.item_factors.shape[1],))
+        self.assertGreater(bias, 0)
+
+    def test_ratings_of_unknown_books_are_ignored(self):
+        self.model.fold_in_user(3, [(999, 7)], self.model.trained_at)
+        factors, bias = self.model.get_user_factors(3)
+        self.assertEqual(self.model.get_user_ratings(3), [])
+        self.assertFalse(factors.any())
+        self.assertEqual(bias, 0.0)
+
+    def test_batch_matches_per_user_recommendations(self):
+        Rating.objects.create(user_id=3, book_id=1, rating=6)
+        User.objects.get(id=1).all_books.add(2)
+        user_ids = [1, 2, 3]
+        batch = self.svd_model.get_recommendations_batch(user_ids, 3)
+        for user_id in user_ids:
+            self.assertEqual(batch[user_id], self.svd_model.get_recommendations(user_id, 3))
+
+    def test_batch_query_count_does_not_grow_with_users(self):
+        Rating.objects.create(user_id=3, book_id=1, rating=6)
+        with self.assertNumQueries(3):
+            self.svd_model.get_recommendations_batch([1, 2, 3], 3)
+
+    def test_batch_gives_unknown_users_no_recommendations(self):
+        self.assertEqual(self.svd_model.get_recommendations_batch([999], 3), {999: []})
@@ -0,0 +1,58 @@
+"""Unit tests for loading recommender training data."""
+from datetime import timedelta
+
+import pandas as pd
+from bookclub.models import Rating
+from bookclub.recommender.training import build_trainset, load_ratings
+from django.test import TestCase
+from django.utils import timezone
+from surprise import Dataset, Reader
+
+
+class TrainingDataTestCase(TestCase):
+    """Unit tests for loading recommender training data."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json',
+                'bookclub/tests/fixtures/other_users.json',
+                'bookclub/tests/fixtures/default_book.json',
+                'bookclub/tests/fixtures/other_books.json',
+                'bookclub/tests/fixtures/default_rating.json',
+                'bookclub/tests/fixtures/other_ratings.json']
+
+    def test_load_ratings_returns_all_rows_in_order(self):
+        user_ids, book_ids, ratings = load_ratings()
+        expected = list(Rating.objects.order_by('id').values_list('user_id', 'book_id', 'rating'))
+        self.assertEqual(list(zip(user_ids.tolist(), book_ids.tolist(), ratings.tolist())), expected)
+
+    def test_load_ratings_uses_one_query(self):
+        with self.assertNumQueries(1):
+            load_ratings(chunk_size=1)
+
+    def test_load_ratings_with_small_chunks(self):
+        user_ids, book_ids, ratings = load_ratings(chunk_size=1)
+        self.assertEqual(len(user_ids), Rating.objects.count())
+        self.assertEqual(user_ids.tolist(), [1, 2, 1])
+
+    def test_load_ratings_since(self):
+        Rating.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        since = timezone.now()
+        Rating.objects.get(id=2).save()
+        user_ids, book_ids, ratings = load_ratings(since=since)
+        self.assertEqual(user_ids.tolist(), [2])
+        self.assertEqual(book_ids.tolist(), [2])
+
+    def test_load_ratings_with_empty_table(self):
+        Rating.objects.all().delete()
+        user_ids, book_ids, ratings = load_ratings()
+        self.assertEqual(len(user_ids), 0)
+
+    def test_build_trainset_matches_surprise(self):
+        user_ids, book_ids, ratings = load_ratings()
+        trainset = build_trainset(user_ids, book_ids, ratings)
+        df = pd.DataFrame({'userID': user_ids, 'bookID': book_ids, 'rating': ratings})
+        expected = Dataset.load_from_df(df, Reader(rating_scale=(0, 10))).build_full_trainset()
+        self.assertEqual(trainset.n_users, expected.n_users)
+        self.assertEqual(trainset.n_items, expected.n_items)
+        self.assertEqual(dict(trainset.ur), dict(expected.ur))
+        for inner_iid in range(trainset.n_items):
+            self.assertEqual(trainset.to_raw_iid(inner_iid), expected.to_raw_iid(inner_iid))
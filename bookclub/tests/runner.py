@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner that keeps the recommender off the real artifacts and background workers.
+
+    Models and metrics are written to a temporary directory removed after
+    the run, training and refreshes run synchronously, nothing is published
+    to shared memory and the popularity and genre caches are never reused.
+    The settings are overridden before the test modules are imported,
+    because the recommender singletons read them at import."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._settings = override_settings(
+            RECOMMENDER_ARTIFACT_DIR=os.path.join(self._tmp_dir.name, 'recommender_artifacts'),
+            RECOMMENDER_METRICS_DIR=os.path.join(self._tmp_dir.name, 'recommender_metrics'),
+            RECOMMENDER_TRAIN_IN_BACKGROUND=False,
+            RECOMMENDER_REFRESH_IN_BACKGROUND=False,
+            RECOMMENDER_SHARED_MEMORY=False,
+            RECOMMENDER_POPULAR_TTL=0,
+            RECOMMENDER_GENRE_TTL=0,
+        )
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.disable()
+        self._tmp_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -2,7 +2,7 @@
 from bookclub.helpers import rec_helper
 from bookclub.models import Book, Club, User
 from bookclub.recommender.recommendation import Recommendation
-from bookclub.recommender.SVDModel import SVDModel
+from bookclub.recommender.training import train_model
 from bookclub.tests.helpers import LoginRedirectTester, LogInTester, MenuTestMixin, NotificationsTester,ObjectsCreator
 from django.test import TestCase
 from django.urls import reverse
@@ -26,7 +26,7 @@ class HomeViewTestCase(TestCase , LogInTester, LoginRedirectTester, MenuTestMixi
         self.user = User.objects.get(id=1)
         self.second_user = User.objects.get(id=2)
         
-        SVDModel(rec_helper).train(rec_helper)
+        rec_helper.set_model(train_model())
 
         self.first_club = Club.objects.get(id=1)
         self.second_club = Club.objects.get(id=2)
@@ -0,0 +1,41 @@
+"""Tests of the recommender metrics view."""
+from bookclub.models import User
+from bookclub.recommender.metrics import pipeline_metrics
+from django.test import TestCase
+from django.urls import reverse
+
+
+class RecommenderMetricsViewTestCase(TestCase):
+    """Tests of the recommender metrics view."""
+
+    fixtures = ['bookclub/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(id=1)
+        self.url = reverse('recommender_metrics')
+        pipeline_metrics.clear()
+
+    def test_recommender_metrics_url(self):
+        self.assertEqual(self.url, '/recommender/metrics/')
+
+    def test_non_staff_user_gets_404(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_staff_user_gets_stage_metrics(self):
+        self.user.is_staff = True
+        self.user.save()
+        with pipeline_metrics.stage('candidates'):
+            User.objects.count()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        stage = response.json()['stages']['candidates']
+        self.assertEqual(stage['calls'], 1)
+        self.assertEqual(stage['queries_per_call'], 1.0)
+        self.assertIn('p99_ms', stage)
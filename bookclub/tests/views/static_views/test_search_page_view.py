@@ -161,3 +161,11 @@ class SearchPageTest(TestCase, LoginRedirectTester,MenuTestMixin, ObjectsCreator
 
 
     
+
+    def test_search_books_with_part_of_a_genre(self):
+        self.create_test_search_books()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, self.book_genre_form_input)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "uio")
+        self.assertContains(response, "xyz")
@@ -38,6 +38,15 @@ class InitialBookListViewTestCase(TestCase, LoginRedirectTester, ObjectsCreator)
         self.assertTemplateUsed(response, 'user_templates/initial_book_list.html')
         self.assertEqual(len(response.context['my_books']),num_of_public_clubs)
 
+    def test_genres_without_books_suggest_different_genres(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.create_test_books(10)
+        response = self.client.get(self.url, {'genre': 'no such genre'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['my_books']), 0)
+        self.assertContains(response, 'Try different genres')
+        self.assertNotContains(response, 'book0 title')
+
     def test_initial_book_list_when_not_logged_in(self):
         self.assert_redirects_when_not_logged_in()
 
@@ -1,6 +1,6 @@
 
 from bookclub.forms import BookForm, BooksSortForm, EditRatingForm, RatingForm
-from bookclub.helpers import NotificationHelper, SortHelper,get_recommender_books, rec_helper
+from bookclub.helpers import NotificationHelper, SortHelper,get_recommender_books, retrain_scheduler
 from bookclub.models import Book, Club, Rating, User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -153,7 +153,7 @@ class AddReviewView(LoginRequiredMixin, FormView):
 
         form.save()
         self.review_user.add_book_to_all_books(self.reviewed_book)
-        rec_helper.increment_counter()
+        retrain_scheduler.record_change()
         notify.send(self.review_user, recipient=self.review_user.followers.all(), verb=NotificationHelper().NotificationMessages.REVIEW, action_object=self.reviewed_book, description='user-event-B' )
         messages.add_message(self.request, messages.SUCCESS, 'You successfully submitted the review.')
 
@@ -202,7 +202,7 @@ class EditReviewView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         """Process valid form."""
         form.save()
-        rec_helper.increment_counter()
+        retrain_scheduler.record_change()
         messages.add_message(self.request, messages.SUCCESS, "Successfully updated your review!")
         return super().form_valid(form)
 
@@ -2,8 +2,9 @@ from datetime import timedelta
 from threading import Timer
 
 from bookclub.forms import MeetingForm
-from bookclub.helpers import MeetingHelper, NotificationHelper, get_recommender_books, rec_helper
+from bookclub.helpers import MeetingHelper, NotificationHelper, get_recommender_books, retrain_scheduler
 from bookclub.models import Book, Club, Meeting, User
+from bookclub.search import search
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -115,7 +116,7 @@ class SearchBookView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         """Return filtered book list based on the searched term."""
-        books = Book.objects.filter(title__contains=self.searched)
+        books = search(Book, 'title', self.searched)
         return books
 
     def get_context_data(self, **kwargs):
@@ -179,7 +180,7 @@ def choose_book(request, book_id, meeting_id):
     if request.user == meeting.chooser and not meeting.book:
         book = get_object_or_404(Book.objects, id=book_id)
         meeting.assign_book(book)
-        rec_helper.increment_counter()
+        retrain_scheduler.record_change()
 
         #send email to member who has to choose a book
         MeetingHelper().send_email(request=request,
@@ -1,10 +1,12 @@
 from bookclub.forms import BooksSortForm, ClubsSortForm, UsersSortForm
-from bookclub.helpers import NotificationHelper, SortHelper,get_list_of_objects, get_recommender_books
-from bookclub.models import Book
+from bookclub.helpers import NotificationHelper, SortHelper,get_list_of_objects, get_user_recommended_books
+from bookclub.recommender.hydration import hydrate_books
+from bookclub.recommender.metrics import pipeline_metrics
+from bookclub.recommender.popularity import popular_books
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.generic import ListView
 from django.views.generic.base import TemplateView
@@ -26,13 +28,12 @@ class HomeView(TemplateView):
             notifications = current_user.notifications.unread()
             user_events = notifications.filter(description__contains ='user-event')[:25]
             club_events = notifications.filter(description__contains='club-event')[:10]
-            top_rated_books = get_recommender_books(self.request, True, 3, user_id=current_user.id)
+            top_rated_books = get_user_recommended_books(current_user.id, 3)
         else:
             notifications = None
             user_events = []
             club_events = []
-            books = Book.objects.all()
-            top_rated_books = books.order_by('-average_rating','-readers_count')[:3]
+            top_rated_books = hydrate_books(popular_books.get_book_ids(3))
 
         context['club_events'] = list(club_events)
         context['club_events_length'] = len(club_events)
@@ -153,3 +154,10 @@ def mark_as_read(request, slug=None):
     notification = get_object_or_404(Notification, recipient=request.user, id=notification_id)
     notification.mark_as_read()
     return NotificationHelper().get_appropriate_redirect(notification)
+
+"""Show the recommendation pipeline metrics to staff."""
+@login_required
+def recommender_metrics(request):
+    if not request.user.is_staff:
+        raise Http404
+    return JsonResponse(pipeline_metrics.summary())
@@ -1,5 +1,7 @@
-from bookclub.helpers import NotificationHelper, getGenres, rec_helper
+from bookclub.helpers import NotificationHelper, getGenres, retrain_scheduler
 from bookclub.models import Book
+from bookclub.recommender.hydration import hydrate_books
+from bookclub.recommender.popularity import popular_books
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -24,7 +26,7 @@ def add_book_to_list(request, book_id):
         notificationHelper.delete_notifications(user, user.followers.all(), notificationHelper.NotificationMessages.ADD, book )
         notify.send(user, recipient=user.followers.all(), verb=notificationHelper.NotificationMessages.ADD, action_object=book, description='user-event-B' )
         messages.add_message(request, messages.SUCCESS, "Book Added!")
-    rec_helper.increment_counter()
+    retrain_scheduler.record_change()
     return HttpResponseRedirect(request.META.get('HTTP_REFERER', reverse('home')))
 
 
@@ -36,15 +38,10 @@ class InitialBookListView(LoginRequiredMixin, TemplateView):
         """Generate context data to be shown in the template."""
         context = super().get_context_data(**kwargs)
         current_user = self.request.user
-        already_selected_books = current_user.books.all()
-        my_books = Book.objects.all().exclude(id__in=already_selected_books)
+        already_selected_books = current_user.books.values_list('id', flat=True)
 
         genres = self.request.GET.getlist('genre')
-        if genres:
-            for genre in genres:
-                my_books = my_books.filter(genre__contains=genre)
-
-        sorted_books = my_books.order_by('-average_rating','-readers_count')[:8]
+        sorted_books = hydrate_books(popular_books.get_book_ids(8, exclude=already_selected_books, genres=genres))
 
         context['my_books'] = sorted_books
         context['list_length'] = len(current_user.books.all())
@@ -59,7 +56,6 @@ class InitialGenresView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         """Generate context data to be shown in the template."""
         context = super().get_context_data(**kwargs)
-        genres = getGenres()
-        context['genres'] = sorted(genres, reverse=True, key=genres.get)[0:40]
+        context['genres'] = list(getGenres(40))
         return context
 
@@ -1,9 +1,14 @@
 import csv
 import os
+import sys
 from collections import defaultdict
 
 from surprise import Dataset, Reader
 
+# The evaluator runs from its own directory; the genre bitsets live in the app
+sys.path.append(os.path.abspath('..'))
+from bookclub.recommender.bitsets import GenreBitsets
+
 
 class BookRatings:
     ratings_path = os.path.abspath('../book-review-dataset/ratings-evaluator.csv')
@@ -31,33 +36,13 @@ class BookRatings:
         return ratingsDataset
 
     def getGenres(self):
-        genres = defaultdict(list)
-        genreIDs = {}
-        maxGenreID = 0
+        """Return every book's genres as packed bitsets, keyed by book id.
+
+        bitfield(bookID) gives the old 0/1 list of a single book."""
         with open(self.books_path, newline='', encoding='ISO-8859-1') as csvfile:
             bookReader = csv.reader(csvfile)
-            next(bookReader) 
-            for row in bookReader:
-                bookID = int(row[7])
-                genreList = row[6].split(',')
-                genreIDList = []
-                for genre in genreList:
-                    if genre in genreIDs:
-                        genreID = genreIDs[genre]
-                    else:
-                        genreID = maxGenreID
-                        genreIDs[genre] = genreID
-                        maxGenreID += 1
-                    genreIDList.append(genreID)
-                genres[bookID] = genreIDList
-        # Convert integer-encoded genre lists to bitfields that we can treat as vectors
-        for (bookID, genreIDList) in genres.items():
-            bitfield = [0] * maxGenreID
-            for genreID in genreIDList:
-                bitfield[genreID] = 1
-            genres[bookID] = bitfield            
-        
-        return genres
+            next(bookReader)
+            return GenreBitsets.from_genres((int(row[7]), dict.fromkeys(row[6].split(','))) for row in bookReader)
 
     def getPopularityRanks(self):
         ratings = defaultdict(int)
@@ -159,6 +159,72 @@ BOOKS_PER_PAGE = 48
 CLUBS_PER_PAGE = 48
 MEMBERS_PER_PAGE = 50
 
+# Recommender model artifacts written by the train_recommender command
+RECOMMENDER_ARTIFACT_DIR = os.path.join(BASE_DIR, 'recommender_artifacts')
+
+# Publish every trained model into one shared memory segment that all
+# worker processes attach to read-only, instead of one copy per worker
+RECOMMENDER_SHARED_MEMORY = True
+
+# Number of most similar books kept per book in the item neighbour index
+RECOMMENDER_NEIGHBORS = 50
+
+# Approximate top-N search over the SVD item factors: number of k-means lists
+# (None for sqrt of the number of books) and how many of them a query reads.
+# More probed lists give better recall at a higher latency.
+RECOMMENDER_ANN_LISTS = None
+RECOMMENDER_ANN_NPROBE = 8
+
+# Implicit-feedback ALS over reading lists, readers and club books, used for
+# users without ratings: number of factors, regularisation, confidence per
+# unit of signal weight, ALS sweeps and conjugate gradient steps per sweep.
+# RECOMMENDER_READING_LIST_ENGINE picks 'als' or the older 'genre' model.
+RECOMMENDER_ALS_FACTORS = 32
+RECOMMENDER_ALS_REGULARIZATION = 0.1
+RECOMMENDER_ALS_ALPHA = 40.0
+RECOMMENDER_ALS_ITERATIONS = 15
+RECOMMENDER_ALS_CG_STEPS = 3
+RECOMMENDER_READING_LIST_ENGINE = 'als'
+
+# Recommender retraining: after this many new or edited ratings, or after
+# this many seconds once anything has changed. Background retraining runs in
+# a separate process so it never competes with requests for the GIL.
+RECOMMENDER_TRAIN_IN_BACKGROUND = True
+RECOMMENDER_TRAIN_OUT_OF_PROCESS = True
+RECOMMENDER_RETRAIN_AFTER_RATINGS = 10
+RECOMMENDER_RETRAIN_INTERVAL = 60 * 60
+RECOMMENDER_STALENESS_CHECK_INTERVAL = 10
+RECOMMENDER_TRAINING_TIMEOUT = 30 * 60
+
+# Number of most popular books kept in memory for cold-start pages, and how
+# often (in seconds) they are reloaded to pick up other workers' changes
+RECOMMENDER_POPULAR_SIZE = 2000
+RECOMMENDER_POPULAR_TTL = 60
+
+# Maximum age in seconds of a process's genre inverted index; books saved
+# in the same process update it straight away
+RECOMMENDER_GENRE_TTL = 60
+
+# How genre recommendations for a whole reading list combine the similarity
+# to each book: 'sum' (one pass over the reading list's genre profile) or
+# 'max'
+RECOMMENDER_GENRE_AGGREGATE = 'sum'
+
+# Length of the precomputed per-user recommendation lists, and whether stale
+# lists are recomputed off the request thread
+RECOMMENDER_MATERIALIZED_SIZE = 24
+RECOMMENDER_REFRESH_IN_BACKGROUND = True
+
+# Recommendation pipeline stage metrics: each process keeps the latest
+# durations of every stage and writes them to the metrics directory at most
+# every flush interval seconds
+RECOMMENDER_METRICS_DIR = os.path.join(BASE_DIR, 'recommender_metrics')
+RECOMMENDER_METRICS_WINDOW = 1024
+RECOMMENDER_METRICS_FLUSH_INTERVAL = 10
+
+# Test runs keep the recommender off the real artifacts; see the runner
+TEST_RUNNER = 'bookclub.tests.runner.TestRunner'
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_USE_TLS = True
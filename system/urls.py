@@ -33,6 +33,7 @@ urlpatterns = [
     path('search/', static_views.SearchPageView.as_view(), name='search_page'),
     path('search/<str:searched>/<str:label>/', static_views.ShowSortedView.as_view(), name = "show_sorted"),
     path(r'mark-as-read/(<slug>[-\w]+)', static_views.mark_as_read, name='mark_as_read'),
+    path('recommender/metrics/', static_views.recommender_metrics, name='recommender_metrics'),
 
     path('SignUp/', authentication_views.SignUpView.as_view(),  name='sign_up'),   
     path('send_activation/<int:user_id>/', authentication_views.send_activiation_email,  name='send_activation'),   